@@ -2,6 +2,7 @@ from src.core.Solution import Solution
 from src.algorithm.operators.LocalSearch import CreateRoute, InjectBefore, InjectAfter
 import random
 import logging
+import time
 
 
 class NearestSearch:
@@ -9,10 +10,12 @@ class NearestSearch:
         self.problem = problem
         self.neighbourhood_size = kwargs.get("neighbourhood_size", self.problem.num_nodes)
         self.seed = kwargs.get("seed", None)
+        self.profile_path = kwargs.get("profile_path", None)
         random.seed(self.seed)
 
     def solve(self):
-        if not self.problem.neighbour_array:
+        start_time = time.perf_counter()
+        if self.problem.neighbour_array is None:
             self.problem.update_neighbour(self.neighbourhood_size)
 
         solution = Solution(self.problem)
@@ -20,35 +23,42 @@ class NearestSearch:
         logging.info(f"{self.__class__.__name__}::initial num of unassigned jobs: {len(solution.unassigned_jobs)}")
 
         # initialize the required operators
-        cache = solution.create_cache()
+        cache = solution.create_cache(transactional=True)
         create_route_op = CreateRoute(cache)
         inject_bef_op = InjectBefore(cache)
         inject_aft_op = InjectAfter(cache)
 
         # create a route for every vehicle and inject a random unassigned jobs
-        for vehicle_idx in range(self.problem.num_vehicles):
+        for vehicle_idx in self.problem.vehicle_indexes:
             if len(solution.unassigned_jobs) == 0:
                 break
 
-            create_route_op.create(vehicle_idx, [random.choice(cache.unassigned_jobs)])
+            create_route_op.create(vehicle_idx, [random.choice(sorted(cache.unassigned_jobs))])
             if cache.eval_constraint():
                 solution.accept_cache()
 
                 # iteratively add the neighbour of the last job in the route if it is unassigned
                 job = cache.get_route(vehicle_idx).jobs[-1]
+                neighbours = self.problem.get_neighbours(job)
                 neighbour_index = 0
-                while neighbour_index < len(cache.problem.neighbour_array[job]):
-                    neighbour = cache.problem.neighbour_array[job][neighbour_index]
+                while neighbour_index < len(neighbours):
+                    neighbour = neighbours[neighbour_index]
                     if neighbour in cache.unassigned_jobs:
+                        # skip the move without applying it if it is known to be infeasible
+                        if inject_aft_op.check(job, neighbour) is False:
+                            neighbour_index += 1
+                            continue
+
                         inject_aft_op.move(job, neighbour)
                         if cache.eval_constraint():
                             solution.accept_cache()
                             job = neighbour
+                            neighbours = self.problem.get_neighbours(job)
                             neighbour_index = 0
                         else:
                             solution.reset_cache()
                             neighbour_index += 1
-                            logging.debug(f"{self.__class__.__name__}::failed to inject neighbour {neighbour}, recovering to last solution")
+                            logging.debug("%s::failed to inject neighbour %s, recovering to last solution", self.__class__.__name__, neighbour)
                     else:
                         neighbour_index += 1
             else:
@@ -59,16 +69,19 @@ class NearestSearch:
         prev_num_unassigned = len(solution.unassigned_jobs)
         solution.reset_cache()
         while len(cache.unassigned_jobs) > 0:
-            logging.debug(f"{self.__class__.__name__}::trying to inject {len(cache.unassigned_jobs)} unassigned jobs: {len(cache.unassigned_jobs)}")
+            logging.debug("%s::trying to inject %s unassigned jobs", self.__class__.__name__, len(cache.unassigned_jobs))
 
-            for unassigned in cache.unassigned_jobs:
+            for unassigned in sorted(cache.unassigned_jobs):
                 inject_successful = False
-                for neighbour in cache.problem.neighbour_array[unassigned]:
+                for neighbour in self.problem.get_neighbours(unassigned):
                     if inject_successful:
                         break
                     if neighbour in cache.unassigned_jobs:
                         continue
                     for op in [inject_bef_op, inject_aft_op]:
+                        if op.check(neighbour, unassigned) is False:
+                            continue
+
                         op.move(neighbour, unassigned)
                         if cache.eval_constraint():
                             solution.accept_cache()
@@ -76,14 +89,21 @@ class NearestSearch:
                             break
                         else:
                             solution.reset_cache()
-                            logging.debug(f"{self.__class__.__name__}::failed to inject neighbour {neighbour}, recovering to last solution")
+                            logging.debug("%s::failed to inject neighbour %s, recovering to last solution", self.__class__.__name__, neighbour)
 
             if len(cache.unassigned_jobs) == prev_num_unassigned:
                 break
+        # the transactional cache stops recording so that the returned solution has no open journal
+        solution.end()
 
         # final evaluation
         solution.eval_solution()
         if len(solution.unassigned_jobs) > 0:
             logging.info(f"{self.__class__.__name__}::final num of unassigned jobs: {len(solution.unassigned_jobs)}")
 
+        if self.problem.profiler is not None:
+            self.problem.profiler.add_time(f"solve.{self.__class__.__name__}", time.perf_counter() - start_time)
+            if self.profile_path is not None:
+                self.problem.profiler.export(self.profile_path)
+
         return solution
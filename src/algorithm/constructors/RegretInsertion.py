@@ -0,0 +1,170 @@
+from src.core.Solution import Solution, Route
+from src.algorithm.operators.Insertion import get_weights, needs_solution_check, get_insertion, insert
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import heapq
+import time
+
+
+class RegretInsertion:
+    """
+    repeatedly inserts the unassigned job with the largest regret, the score difference between its best and next best
+    insertions, at its best position, only routes that contain a granular neighbour of a job and one unused vehicle
+    are candidates and only the insertions into the last changed route are re-evaluated after each insertion
+    """
+    def __init__(self, problem, **kwargs):
+        self.problem = problem
+        self.neighbourhood_size = kwargs.get("neighbourhood_size", self.problem.num_nodes)
+        self.granularity = kwargs.get("granularity", 20)
+        self.regret_degree = kwargs.get("regret_degree", 2)
+        self.num_workers = kwargs.get("num_workers", 1)
+        self.profile_path = kwargs.get("profile_path", None)
+        self.weights = get_weights(self.problem, kwargs.get("weights", None))
+
+        self.solution = None
+        self.executor = None
+        self.num_threads = 1
+        self.check_solution = False
+        self.reverse_neighbours = {}
+        self.unused_vehicles = []
+        self.open_route = None
+        # best insertion of every unassigned job into each of its candidate routes as {route: (score, index)}
+        self.insertions = {}
+        # unassigned jobs that have the route as candidate
+        self.route_jobs = {}
+        self.versions = {}
+        self.heap = []
+
+    def solve(self):
+        start_time = time.perf_counter()
+        if self.problem.neighbour_array is None:
+            self.problem.update_neighbour(self.neighbourhood_size)
+
+        solution = self.solution = Solution(self.problem)
+        solution.eval_solution()
+        logging.info(f"{self.__class__.__name__}::initial num of unassigned jobs: {len(solution.unassigned_jobs)}")
+
+        constraints = self.problem.model.constraints
+        self.check_solution = needs_solution_check(self.problem)
+        self.num_threads = self.num_workers
+        if self.num_threads > 1 and not all(getattr(constraint, "insertion_function", None) for constraint in constraints):
+            logging.warning(f"{self.__class__.__name__}::insertions are scored on one thread as some constraints have no insertion function")
+            self.num_threads = 1
+        self.executor = ThreadPoolExecutor(max_workers=self.num_threads) if self.num_threads > 1 else None
+
+        # the jobs that have a job among their granular neighbours gain the route of that job as candidate
+        self.reverse_neighbours = {job: [] for job in self.problem.job_indexes}
+        for job in self.problem.job_indexes:
+            for neighbour in self.problem.get_neighbours(job)[:self.granularity]:
+                if neighbour in self.reverse_neighbours:
+                    self.reverse_neighbours[neighbour].append(job)
+
+        self.unused_vehicles = self.problem.vehicle_indexes[::-1]
+        self.insertions = {job: {} for job in solution.unassigned_jobs}
+        self.route_jobs = {}
+        self.versions = {job: 0 for job in solution.unassigned_jobs}
+        self.heap = []
+        self.open_route = None
+
+        solution.begin()
+        self.open_next_route()
+        while self.heap:
+            _, _, job, version = heapq.heappop(self.heap)
+            if version != self.versions[job] or job not in solution.unassigned_jobs:
+                continue
+
+            insertions = self.insertions[job]
+            route = min(insertions, key=lambda candidate: insertions[candidate])
+            index = insertions[route][1]
+            opened = route is self.open_route
+            if not self.insert(route, index, job):
+                # the insertion was feasible on its own but not together with solution-level constraints
+                del insertions[route]
+                self.route_jobs[route].discard(job)
+                self.push(job)
+                continue
+
+            del self.insertions[job]
+            neighbours = {neighbour for neighbour in self.reverse_neighbours[job] if neighbour in solution.unassigned_jobs}
+            if opened:
+                # the opened route stays a candidate only for the jobs that have the inserted job as neighbour
+                for other in self.route_jobs[route] - neighbours:
+                    if other in solution.unassigned_jobs:
+                        self.insertions[other].pop(route, None)
+                self.route_jobs[route] = neighbours
+                self.update(route, neighbours)
+                self.open_next_route()
+            else:
+                self.route_jobs[route].update(neighbours)
+                self.update(route, self.route_jobs[route])
+        solution.end()
+
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+        # final evaluation
+        solution.eval_solution()
+        if len(solution.unassigned_jobs) > 0:
+            logging.info(f"{self.__class__.__name__}::final num of unassigned jobs: {len(solution.unassigned_jobs)}")
+
+        if self.problem.profiler is not None:
+            self.problem.profiler.add_time(f"solve.{self.__class__.__name__}", time.perf_counter() - start_time)
+            if self.profile_path is not None:
+                self.problem.profiler.export(self.profile_path)
+
+        return solution
+
+    def open_next_route(self):
+        # the next unused vehicle is a candidate route of every unassigned job
+        self.open_route = Route(self.unused_vehicles.pop()) if self.unused_vehicles else None
+        if self.open_route is None:
+            for job in self.solution.unassigned_jobs:
+                self.push(job)
+            return
+
+        self.route_jobs[self.open_route] = set(self.solution.unassigned_jobs)
+        self.update(self.open_route, self.route_jobs[self.open_route])
+
+    def insert(self, route, index, job):
+        return insert(self.solution, route, index, job, self.check_solution, new_route=route is self.open_route)
+
+    def update(self, route, jobs):
+        # re-evaluates the insertions of the jobs into the changed route and pushes their new regrets
+        jobs = sorted(job for job in jobs if job in self.solution.unassigned_jobs)
+        if self.executor is None or len(jobs) < 2 * self.num_threads:
+            results = [self.get_insertion(route, job) for job in jobs]
+        else:
+            num_chunks = self.num_threads
+            chunks = [jobs[i::num_chunks] for i in range(num_chunks)]
+            chunk_results = list(self.executor.map(lambda chunk: [self.get_insertion(route, job) for job in chunk], chunks))
+            results = [None] * len(jobs)
+            for i, chunk_result in enumerate(chunk_results):
+                results[i::num_chunks] = chunk_result
+
+        for job, insertion in zip(jobs, results):
+            if insertion is None:
+                self.insertions[job].pop(route, None)
+            else:
+                self.insertions[job][route] = insertion
+            self.push(job)
+
+    def get_insertion(self, route, job):
+        return get_insertion(self.solution, route, job, self.weights, self.check_solution)
+
+    def push(self, job):
+        self.versions[job] += 1
+        insertions = self.insertions[job]
+        if not insertions:
+            return
+
+        scores = sorted(score for score, _ in insertions.values())
+        # every further unused vehicle is an option as good as the open route
+        if self.open_route in insertions:
+            scores = sorted(scores + [insertions[self.open_route][0]] * min(self.regret_degree - 1, len(self.unused_vehicles)))
+        if len(scores) < self.regret_degree:
+            regret = float("inf")
+        else:
+            regret = sum(score - scores[0] for score in scores[1:self.regret_degree])
+        # equal regrets are broken by the more expensive job, which seeds new routes with the farthest jobs first
+        heapq.heappush(self.heap, (-regret, -scores[0], job, self.versions[job]))
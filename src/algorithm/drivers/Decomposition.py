@@ -0,0 +1,180 @@
+from src.core.Solution import Solution, Route
+from src.algorithm.constructors.RegretInsertion import RegretInsertion
+from src.algorithm.improvers.GranularSearch import GranularSearch
+from src.algorithm.drivers.Replanner import Replanner
+from src.algorithm.drivers.WorkerPool import make_pool, get_worker_state
+import numpy as np
+import logging
+import math
+import time
+import os
+
+
+def solve_cluster(problem, constructor, improve, kwargs, node_indexes, vehicle_indexes):
+    # solves the subproblem of one cluster and returns its routes with the indexes of the whole problem
+    subproblem = problem.get_subproblem(node_indexes, vehicle_indexes)
+    solution = constructor(subproblem, **kwargs).solve()
+    if improve:
+        solution = GranularSearch(subproblem, **kwargs).solve(solution)
+    return [(vehicle_indexes[route.vehicle_idx], [node_indexes[job] for job in route.jobs]) for route in solution.routes if len(route.jobs) > 0]
+
+
+def solve_cluster_in_worker(constructor, improve, kwargs, node_indexes, vehicle_indexes):
+    return solve_cluster(get_worker_state(), constructor, improve, kwargs, node_indexes, vehicle_indexes)
+
+
+class Decomposition:
+    """
+    cluster-first solver for large instances, the jobs are partitioned by the angle around the depot or by k-means on
+    their coordinates, every cluster is solved as a subproblem with its share of the vehicles in a process pool and the
+    merged routes are repaired and improved around the cluster boundaries only
+    """
+    def __init__(self, problem, constructor=RegretInsertion, **kwargs):
+        self.problem = problem
+        self.constructor = constructor
+        self.cluster_size = kwargs.pop("cluster_size", 200)
+        self.num_clusters = kwargs.pop("num_clusters", None)
+        self.method = kwargs.pop("method", "angular")
+        self.x_attr = kwargs.pop("x_attr", "x")
+        self.y_attr = kwargs.pop("y_attr", "y")
+        self.num_workers = kwargs.pop("num_workers", os.cpu_count())
+        self.improve = kwargs.pop("improve", False)
+        # the boundary pass is one sweep over the jobs that have one of their closest neighbours in another cluster
+        self.boundary_granularity = kwargs.pop("boundary_granularity", 5)
+        self.boundary_iterations = kwargs.pop("boundary_iterations", 1)
+        self.profile_path = kwargs.pop("profile_path", None)
+        self.kwargs = kwargs
+        self.clusters = []
+
+    def solve(self):
+        start_time = time.perf_counter()
+        jobs = list(self.problem.job_indexes)
+        num_clusters = self.num_clusters or math.ceil(len(jobs) / self.cluster_size)
+        num_clusters = max(1, min(num_clusters, len(jobs), len(self.problem.vehicle_indexes)))
+        self.clusters = self.get_clusters(jobs, num_clusters)
+        vehicle_subsets = self.get_vehicle_subsets(self.clusters)
+        logging.info(f"{self.__class__.__name__}::{len(jobs)} jobs in {len(self.clusters)} clusters")
+
+        depots = list(range(len(self.problem.depot_index_list)))
+        tasks = [(depots + cluster, vehicles) for cluster, vehicles in zip(self.clusters, vehicle_subsets)]
+        if self.num_workers > 1 and len(tasks) > 1:
+            with make_pool(self.num_workers, self.problem) as executor:
+                futures = [executor.submit(solve_cluster_in_worker, self.constructor, self.improve, self.kwargs, nodes, vehicles)
+                           for nodes, vehicles in tasks]
+                results = [future.result() for future in futures]
+        else:
+            results = [solve_cluster(self.problem, self.constructor, self.improve, self.kwargs, nodes, vehicles) for nodes, vehicles in tasks]
+        solve_time = time.perf_counter() - start_time
+
+        solution = Solution(self.problem)
+        for routes in results:
+            for vehicle_idx, route_jobs in routes:
+                solution.add_route(Route(vehicle_idx, route_jobs))
+        solution.eval_solution()
+        logging.info(f"{self.__class__.__name__}::clusters solved in {solve_time:.2f}s, merged objectives: {solution.objectives_output}")
+
+        solution = self.repair_boundaries(solution)
+        logging.info(f"{self.__class__.__name__}::final objectives: {solution.objectives_output} in {time.perf_counter() - start_time:.2f}s")
+
+        if self.problem.profiler is not None:
+            self.problem.profiler.add_time(f"solve.{self.__class__.__name__}", time.perf_counter() - start_time)
+            if self.profile_path is not None:
+                self.problem.profiler.export(self.profile_path)
+
+        return solution
+
+    def get_coordinates(self, jobs):
+        x_attr, y_attr = getattr(self.problem.model, self.x_attr), getattr(self.problem.model, self.y_attr)
+        xs = np.array([self.problem.get_node_attr(job, x_attr) for job in jobs], dtype=float)
+        ys = np.array([self.problem.get_node_attr(job, y_attr) for job in jobs], dtype=float)
+        return xs, ys
+
+    def get_clusters(self, jobs, num_clusters):
+        """
+        partitions the jobs into num_clusters lists, angular clusters are equal slices of a sweep around the first
+        depot starting at the widest angular gap and kmeans clusters are refined from the angular ones
+        """
+        xs, ys = self.get_coordinates(jobs)
+        depot_x, depot_y = (values[0] for values in self.get_coordinates(self.problem.depot_index_list[:1]))
+        angles = np.arctan2(ys - depot_y, xs - depot_x)
+        order = np.argsort(angles, kind="stable")
+        # start the sweep after the widest gap so that no dense group is cut at the wrap-around
+        gaps = np.diff(np.append(angles[order], angles[order[0]] + 2 * np.pi))
+        order = np.roll(order, -(int(np.argmax(gaps)) + 1))
+        labels = np.empty(len(jobs), dtype=np.int64)
+        for cluster_idx, members in enumerate(np.array_split(order, num_clusters)):
+            labels[members] = cluster_idx
+
+        if self.method == "kmeans":
+            labels = self.refine_kmeans(xs, ys, labels, num_clusters)
+        elif self.method != "angular":
+            logging.error(f"{self.__class__.__name__}::unknown clustering method: {self.method}")
+            exit(1)
+
+        clusters = [[] for _ in range(num_clusters)]
+        for job, label in zip(jobs, labels.tolist()):
+            clusters[label].append(job)
+        return [cluster for cluster in clusters if cluster]
+
+    def refine_kmeans(self, xs, ys, labels, num_clusters, max_iterations=20):
+        points = np.column_stack([xs, ys])
+        for _ in range(max_iterations):
+            counts = np.bincount(labels, minlength=num_clusters)
+            centres = np.zeros((num_clusters, 2))
+            np.add.at(centres, labels, points)
+            centres /= np.maximum(counts, 1)[:, None]
+            distances = ((points[:, None, :] - centres[None, :, :]) ** 2).sum(axis=2)
+            # empty clusters get no points
+            distances[:, counts == 0] = np.inf
+            new_labels = np.argmin(distances, axis=1)
+            if (new_labels == labels).all():
+                break
+            labels = new_labels
+
+        return labels
+
+    def get_vehicle_subsets(self, clusters):
+        # vehicles are shared out in proportion to the number of jobs of each cluster, at least one per cluster
+        vehicles = list(self.problem.vehicle_indexes)
+        num_jobs = sum(len(cluster) for cluster in clusters)
+        shares = [len(vehicles) * len(cluster) / num_jobs for cluster in clusters]
+        counts = [max(1, int(share)) for share in shares]
+        # the remaining vehicles go to the largest remainders, surplus ones are taken from the largest clusters
+        for cluster_idx in sorted(range(len(clusters)), key=lambda idx: counts[idx] - shares[idx]):
+            if sum(counts) >= len(vehicles):
+                break
+            counts[cluster_idx] += 1
+        while sum(counts) > len(vehicles):
+            counts[max(range(len(counts)), key=lambda idx: counts[idx])] -= 1
+
+        subsets = []
+        start = 0
+        for count in counts:
+            subsets.append(vehicles[start:start + count])
+            start += count
+        return subsets
+
+    def get_boundary_jobs(self):
+        # jobs with a close neighbour in another cluster, the only ones whose moves can join two clusters
+        labels = {}
+        for cluster_idx, cluster in enumerate(self.clusters):
+            for job in cluster:
+                labels[job] = cluster_idx
+
+        return [job for job in self.problem.job_indexes
+                if any(labels.get(neighbour, labels[job]) != labels[job] for neighbour in self.problem.get_neighbours(job)[:self.boundary_granularity])]
+
+    def repair_boundaries(self, solution):
+        # inserts the jobs no cluster could serve and improves the solution around the cluster boundaries
+        if self.problem.neighbour_array is None:
+            self.problem.update_neighbour(self.kwargs.get("neighbourhood_size", 100))
+
+        unassigned_jobs = sorted(solution.unassigned_jobs)
+        if unassigned_jobs:
+            Replanner(self.problem, solution, **self.kwargs).repair(unassigned_jobs)
+            solution.eval_solution()
+
+        boundary_jobs = self.get_boundary_jobs() + unassigned_jobs
+        logging.info(f"{self.__class__.__name__}::improving {len(boundary_jobs)} boundary jobs")
+        granular_search = GranularSearch(self.problem, **{**self.kwargs, "max_iterations": self.boundary_iterations})
+        return granular_search.solve(solution, jobs=boundary_jobs)
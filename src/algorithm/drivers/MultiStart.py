@@ -0,0 +1,50 @@
+from src.core.Solution import Solution, Route
+from src.algorithm.constructors.NearestSearch import NearestSearch
+from src.algorithm.drivers.WorkerPool import make_pool, get_worker_state
+import logging
+import os
+
+
+def solve_seed(constructor, kwargs, seed):
+    solution = constructor(get_worker_state(), seed=seed, **kwargs).solve()
+    # only the routes are sent back, the parent process rebuilds the solution on its own problem
+    return seed, [(route.vehicle_idx, route.jobs.tolist()) for route in solution.routes]
+
+
+class MultiStart:
+    """
+    runs seeded constructions concurrently in a process pool and returns the best solution
+    """
+    def __init__(self, problem, constructor=NearestSearch, **kwargs):
+        self.problem = problem
+        self.constructor = constructor
+        self.num_starts = kwargs.pop("num_starts", os.cpu_count())
+        self.num_workers = kwargs.pop("num_workers", os.cpu_count())
+        self.seed = kwargs.pop("seed", 0)
+        self.kwargs = kwargs
+
+    def build_solution(self, routes):
+        solution = Solution(self.problem)
+        for vehicle_idx, jobs in routes:
+            solution.add_route(Route(vehicle_idx, jobs))
+        solution.eval_solution()
+        return solution
+
+    def solve(self):
+        # build the neighbour lists once so that the workers share them with the rest of the problem
+        if self.problem.neighbour_array is None:
+            self.problem.update_neighbour(self.kwargs.get("neighbourhood_size", self.problem.num_nodes))
+
+        seeds = [self.seed + start for start in range(self.num_starts)]
+        logging.info(f"{self.__class__.__name__}::running {self.num_starts} starts on {self.num_workers} workers")
+        with make_pool(self.num_workers, self.problem) as executor:
+            results = list(executor.map(solve_seed, [self.constructor] * len(seeds), [self.kwargs] * len(seeds), seeds))
+
+        best_seed, best_solution = None, None
+        for seed, routes in results:
+            solution = self.build_solution(routes)
+            if best_solution is None or solution < best_solution:
+                best_seed, best_solution = seed, solution
+
+        logging.info(f"{self.__class__.__name__}::best solution found with seed {best_seed}")
+        return best_solution
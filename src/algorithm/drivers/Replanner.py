@@ -0,0 +1,106 @@
+from src.core.Solution import Route
+from src.algorithm.operators.Insertion import get_weights, needs_solution_check, get_insertion, insert
+import logging
+import time
+
+
+class Replanner:
+    """
+    keeps a solution up to date while jobs and vehicles are added to and removed from its problem, the problem is
+    updated only for the changed entries and the solution is repaired by cheapest insertion into the routes of the
+    granular neighbours of the affected jobs, so that a change costs in proportion to its size
+    """
+    def __init__(self, problem, solution, **kwargs):
+        self.problem = problem
+        self.solution = solution
+        self.neighbourhood_size = kwargs.get("neighbourhood_size", self.problem.num_nodes)
+        self.granularity = kwargs.get("granularity", 20)
+        self.weights = get_weights(self.problem, kwargs.get("weights", None))
+        self.check_solution = needs_solution_check(self.problem)
+
+        if self.problem.neighbour_array is None:
+            self.problem.update_neighbour(self.neighbourhood_size)
+
+    def add_job(self, node_attrs, node_node_attrs=None, vehicle_node_node_attrs=None):
+        """
+        adds a job to the problem, see Problem.add_node for its attributes, and inserts it into the solution,
+        returns the index of the job
+        """
+        job = self.problem.add_node(node_attrs, node_node_attrs, vehicle_node_node_attrs)
+        self.solution.add_unassigned_job(job)
+        self.repair([job])
+
+        return job
+
+    def remove_job(self, job):
+        # removes a job from the problem and its route, the freed capacity is offered to the unassigned jobs
+        route, index = self.solution.locate_job(job)
+        if route is not None:
+            self.solution.remove_job(route, index)
+            if len(route.jobs) == 0:
+                self.solution.remove_route(route)
+        elif job in self.solution.unassigned_jobs:
+            self.solution.remove_unassigned_job(job)
+        self.problem.remove_node(job)
+        self.repair(sorted(self.solution.unassigned_jobs))
+
+    def add_vehicle(self, vehicle_attrs, vehicle_profiles=None):
+        # adds a vehicle to the problem, see Problem.add_vehicle, and inserts the unassigned jobs with it available
+        vehicle_idx = self.problem.add_vehicle(vehicle_attrs, vehicle_profiles)
+        self.repair(sorted(self.solution.unassigned_jobs))
+
+        return vehicle_idx
+
+    def remove_vehicle(self, vehicle_idx):
+        # removes a vehicle from the problem and re-inserts the jobs of its route into the other routes
+        route = self.solution.get_route(vehicle_idx)
+        jobs = []
+        if route is not None:
+            jobs = route.jobs.tolist()
+            self.solution.remove_route(route)
+            for job in jobs:
+                self.solution.add_unassigned_job(job)
+        self.problem.remove_vehicle(vehicle_idx)
+        self.repair(jobs + sorted(set(self.solution.unassigned_jobs) - set(jobs)))
+
+    def repair(self, jobs):
+        """
+        inserts each unassigned job of jobs at its cheapest feasible position among the routes of its granular
+        neighbours and one empty route of an unused vehicle, jobs that fit nowhere stay unassigned
+        """
+        start_time = time.perf_counter()
+        solution = self.solution
+        solution.begin()
+        for job in jobs:
+            if job not in solution.unassigned_jobs:
+                continue
+
+            best = None
+            for route in self.get_candidate_routes(job):
+                insertion = get_insertion(solution, route, job, self.weights, self.check_solution)
+                if insertion is not None and (best is None or insertion[0] < best[0]):
+                    best = (insertion[0], insertion[1], route)
+            if best is None or not insert(solution, best[2], best[1], job, self.check_solution, new_route=best[2] not in solution.routes):
+                logging.debug("%s::job %s stays unassigned", self.__class__.__name__, job)
+        solution.end()
+
+        solution.eval_constraint()
+        solution.eval_objective()
+        if self.problem.profiler is not None:
+            self.problem.profiler.add_time(f"repair.{self.__class__.__name__}", time.perf_counter() - start_time)
+
+        return solution
+
+    def get_candidate_routes(self, job):
+        # the routes of the granular neighbours of job and an empty route for the first unused vehicle
+        routes = []
+        for neighbour in self.problem.get_neighbours(job)[:self.granularity]:
+            route, _ = self.solution.locate_job(neighbour)
+            if route is not None and route not in routes:
+                routes.append(route)
+        for vehicle_idx in self.problem.vehicle_indexes:
+            if self.solution.get_route(vehicle_idx) is None:
+                routes.append(Route(vehicle_idx))
+                break
+
+        return routes
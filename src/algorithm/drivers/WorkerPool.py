@@ -0,0 +1,24 @@
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+# read-only state of the worker process, e.g. the problem, set once per worker by the pool initializer
+worker_state = None
+
+
+def init_worker(state):
+    global worker_state
+    worker_state = state
+
+
+def get_worker_state():
+    return worker_state
+
+
+def make_pool(num_workers, state):
+    """
+    process pool whose workers share state, forked workers inherit it read-only instead of receiving a pickled copy
+    per task, where fork is not available it is pickled once per worker
+    """
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    return ProcessPoolExecutor(max_workers=num_workers, mp_context=context, initializer=init_worker, initargs=(state,))
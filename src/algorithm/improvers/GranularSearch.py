@@ -0,0 +1,142 @@
+from src.algorithm.operators.LocalSearch import InjectBefore, InjectAfter, Swap, TwoOptStar, OrOpt
+from src.algorithm.operators.Insertion import needs_solution_check
+import logging
+import time
+
+
+class GranularSearch:
+    """
+    improves a solution with relocate, swap, 2-opt* and or-opt moves between each job and its closest neighbours,
+    until no move improves the objectives lexicographically
+    """
+    def __init__(self, problem, **kwargs):
+        self.problem = problem
+        self.neighbourhood_size = kwargs.get("neighbourhood_size", self.problem.num_nodes)
+        self.granularity = kwargs.get("granularity", 20)
+        self.strategy = kwargs.get("strategy", "first")
+        self.max_iterations = kwargs.get("max_iterations", None)
+        self.tolerance = kwargs.get("tolerance", 1e-9)
+        self.profile_path = kwargs.get("profile_path", None)
+        self.solution = None
+        self.jobs = None
+        self.operators = {}
+        self.num_moves = 0
+
+    def solve(self, solution, jobs=None):
+        # with jobs given only the moves of those jobs with their neighbours are searched
+        start_time = time.perf_counter()
+        if self.problem.neighbour_array is None:
+            self.problem.update_neighbour(self.neighbourhood_size)
+
+        self.solution = solution
+        self.jobs = None if jobs is None else set(jobs)
+        self.operators = {"relocate_after": InjectAfter(solution),
+                          "relocate_before": InjectBefore(solution),
+                          "swap": Swap(solution),
+                          "two_opt_star": TwoOptStar(solution),
+                          "or_opt_2": OrOpt(solution, segment_length=2),
+                          "or_opt_3": OrOpt(solution, segment_length=3)}
+        self.check_solution = needs_solution_check(self.problem)
+
+        solution.eval_solution()
+        logging.info(f"{self.__class__.__name__}::initial objectives: {solution.objectives_output}")
+        solution.begin()
+        iteration = 0
+        while self.max_iterations is None or iteration < self.max_iterations:
+            improved = self.search_first() if self.strategy == "first" else self.search_best()
+            iteration += 1
+            if not improved:
+                break
+        solution.end()
+
+        solution.eval_solution()
+        logging.info(f"{self.__class__.__name__}::applied {self.num_moves} moves in {iteration} iterations, final objectives: {solution.objectives_output}")
+
+        if self.problem.profiler is not None:
+            self.problem.profiler.add_time(f"solve.{self.__class__.__name__}", time.perf_counter() - start_time)
+            if self.profile_path is not None:
+                self.problem.profiler.export(self.profile_path)
+
+        return solution
+
+    def get_moves(self):
+        # moves between every routed job and the routed jobs in its granular neighbourhood
+        jobs = self.solution.job_locations if self.jobs is None else [job for job in self.jobs if job in self.solution.job_locations]
+        for a in sorted(jobs):
+            for b in self.problem.get_neighbours(a)[:self.granularity]:
+                if b not in self.solution.job_locations:
+                    continue
+                yield "relocate_after", b, a
+                yield "relocate_before", b, a
+                yield "swap", a, b
+                yield "two_opt_star", a, b
+                yield "or_opt_2", a, b
+                yield "or_opt_3", a, b
+
+    def get_values(self, routes):
+        values = []
+        for objective in self.problem.model.objectives:
+            route_function = getattr(objective, "route_function", None)
+            if route_function is None:
+                values.append(objective.function(self.solution))
+            else:
+                values.append(sum(self.solution.get_route_profile(route, route_function) for route in routes))
+
+        return values
+
+    def apply(self, name, a, b):
+        """
+        applies a move and returns its objective deltas, or None if it did nothing or is infeasible,
+        the move is left applied and has to be committed or rolled back by the caller
+        """
+        routes = []
+        for job in [a, b]:
+            route, _ = self.solution.locate_job(job)
+            if route is not None and route not in routes:
+                routes.append(route)
+
+        before = self.get_values(routes)
+        touched_routes = self.operators[name].move(a, b)
+        if not touched_routes or not self.solution.eval_routes_constraint(touched_routes):
+            return None
+        if self.check_solution and not self.solution.eval_constraint():
+            return None
+
+        after = self.get_values(routes)
+        return [value_after - value_before for value_before, value_after in zip(before, after)]
+
+    def get_key(self, deltas):
+        # lexicographic order of the deltas ignoring differences within the tolerance
+        return tuple(0.0 if abs(delta) <= self.tolerance else delta for delta in deltas)
+
+    def is_improving(self, deltas):
+        return self.get_key(deltas) < (0.0,) * len(deltas)
+
+    def search_first(self):
+        improved = False
+        for move in self.get_moves():
+            deltas = self.apply(*move)
+            if deltas is not None and self.is_improving(deltas):
+                self.solution.commit()
+                self.num_moves += 1
+                improved = True
+            else:
+                self.solution.rollback()
+
+        return improved
+
+    def search_best(self):
+        best_move, best_key = None, None
+        for move in self.get_moves():
+            deltas = self.apply(*move)
+            if deltas is not None and self.is_improving(deltas) and (best_key is None or self.get_key(deltas) < best_key):
+                best_move, best_key = move, self.get_key(deltas)
+            self.solution.rollback()
+
+        if best_move is None:
+            return False
+
+        self.apply(*best_move)
+        self.solution.commit()
+        self.num_moves += 1
+        return True
@@ -0,0 +1,203 @@
+from src.core.Solution import Route
+from src.core.SolutionCache import SolutionCache
+from src.algorithm.operators.LocalSearch import InjectBefore, InjectAfter
+from src.algorithm.operators.Insertion import get_weights, get_score
+import logging
+import random
+import math
+import time
+
+
+class AnytimeSearch:
+    """
+    adaptive large neighbourhood search with simulated annealing acceptance under a wall-clock budget,
+    the best solution found so far is returned as soon as the time limit is reached
+    """
+    def __init__(self, problem, **kwargs):
+        self.problem = problem
+        self.neighbourhood_size = kwargs.get("neighbourhood_size", self.problem.num_nodes)
+        self.time_limit = kwargs.get("time_limit", 2.0)
+        self.max_iterations = kwargs.get("max_iterations", None)
+        self.granularity = kwargs.get("granularity", 20)
+        self.min_removal = kwargs.get("min_removal", 2)
+        self.max_removal = kwargs.get("max_removal", 20)
+        self.start_temperature = kwargs.get("start_temperature", 100.0)
+        self.end_temperature = kwargs.get("end_temperature", 0.1)
+        self.reaction = kwargs.get("reaction", 0.1)
+        self.segment_size = kwargs.get("segment_size", 100)
+        self.scores = kwargs.get("scores", (33.0, 9.0, 13.0))
+        self.progress_callback = kwargs.get("progress_callback", None)
+        self.weights = get_weights(self.problem, kwargs.get("weights", None))
+        self.random = random.Random(kwargs.get("seed", None))
+        self.profile_path = kwargs.get("profile_path", None)
+        # optional ParetoArchive that collects the non-dominated feasible solutions accepted during the search
+        self.archive = kwargs.get("archive", None)
+        # destroy and repair often return to a solution seen before, its evaluation is then taken from the cache
+        memo_size = kwargs.get("memo_size", 10000)
+        self.memo = SolutionCache(memo_size) if memo_size > 0 else None
+
+        self.destroy_operators = [self.random_removal, self.related_removal, self.route_removal]
+        self.operator_weights = [1.0] * len(self.destroy_operators)
+        self.inject_bef_op = None
+        self.inject_aft_op = None
+        self.history = []
+        self.num_iterations = 0
+
+    def get_cost(self, solution):
+        return sum(weight * output for weight, output in zip(self.weights, solution.objectives_output))
+
+    def solve(self, solution):
+        deadline = time.perf_counter() + self.time_limit
+        start_time = time.perf_counter()
+        if self.problem.neighbour_array is None:
+            self.problem.update_neighbour(self.neighbourhood_size)
+
+        # every vehicle gets a route so that repairs can open a vehicle by inserting into an empty route
+        current = solution.copy()
+        for vehicle_idx in self.problem.vehicle_indexes:
+            if current.get_route(vehicle_idx) is None:
+                current.add_route(Route(vehicle_idx))
+        current.eval_solution()
+        self.inject_bef_op = InjectBefore(current)
+        self.inject_aft_op = InjectAfter(current)
+
+        best = current.copy()
+        current_cost = best_cost = self.get_cost(current)
+        self.history = [(0.0, 0, list(best.objectives_output))]
+        operator_scores = [0.0] * len(self.destroy_operators)
+        operator_counts = [0] * len(self.destroy_operators)
+
+        current.begin()
+        iteration = 0
+        now = time.perf_counter()
+        while now < deadline and (self.max_iterations is None or iteration < self.max_iterations):
+            # temperature decays geometrically with the fraction of the time budget used
+            progress = (now - start_time) / self.time_limit
+            temperature = self.start_temperature * (self.end_temperature / self.start_temperature) ** progress
+
+            operator_idx = self.random.choices(range(len(self.destroy_operators)), weights=self.operator_weights)[0]
+            if self.problem.profiler is not None:
+                self.problem.profiler.record_move(self.destroy_operators[operator_idx].__name__)
+            removed = self.destroy_operators[operator_idx](current, self.random.randint(self.min_removal, self.max_removal))
+            self.repair(current, removed)
+
+            if self.memo is None:
+                current.eval_solution(allow_infeasible=True)
+            else:
+                self.memo.eval_solution(current, allow_infeasible=True)
+            cost = self.get_cost(current)
+            score = 0.0
+            if self.archive is not None and current.is_feasible:
+                self.archive.add(current)
+            if current.is_feasible and cost < best_cost - 1e-9:
+                current.commit()
+                best, best_cost, current_cost = current.copy(), cost, cost
+                score = self.scores[0]
+                elapsed = time.perf_counter() - start_time
+                self.history.append((elapsed, iteration, list(best.objectives_output)))
+                if self.progress_callback is not None:
+                    self.progress_callback(iteration, elapsed, best)
+            elif current.is_feasible and (cost < current_cost or self.random.random() < math.exp((current_cost - cost) / temperature)):
+                score = self.scores[1] if cost < current_cost else self.scores[2]
+                current.commit()
+                current_cost = cost
+            else:
+                current.rollback()
+
+            # adapt the operator weights at the end of every segment
+            operator_scores[operator_idx] += score
+            operator_counts[operator_idx] += 1
+            iteration += 1
+            if iteration % self.segment_size == 0:
+                for idx in range(len(self.destroy_operators)):
+                    if operator_counts[idx] > 0:
+                        self.operator_weights[idx] = ((1 - self.reaction) * self.operator_weights[idx]
+                                                      + self.reaction * operator_scores[idx] / operator_counts[idx])
+                        self.operator_weights[idx] = max(self.operator_weights[idx], 0.01)
+                operator_scores = [0.0] * len(self.destroy_operators)
+                operator_counts = [0] * len(self.destroy_operators)
+            now = time.perf_counter()
+        current.end()
+
+        # drop the routes of unused vehicles again
+        for route in [route for route in best.routes if len(route.jobs) == 0]:
+            best.remove_route(route)
+
+        self.num_iterations = iteration
+        logging.info(f"{self.__class__.__name__}::{iteration} iterations in {time.perf_counter() - start_time:.2f}s, best objectives: {best.objectives_output}")
+        if self.memo is not None:
+            logging.info(f"{self.__class__.__name__}::memo {self.memo.get_stats()}")
+
+        if self.problem.profiler is not None:
+            self.problem.profiler.add_time(f"solve.{self.__class__.__name__}", time.perf_counter() - start_time)
+            if self.memo is not None:
+                self.problem.profiler.count("memo.hits", self.memo.hits)
+                self.problem.profiler.count("memo.misses", self.memo.misses)
+            if self.profile_path is not None:
+                self.problem.profiler.export(self.profile_path)
+
+        return best
+
+    def remove(self, solution, jobs):
+        removed = []
+        for job in jobs:
+            route, index = solution.locate_job(job)
+            if route is not None:
+                solution.remove_job(route, index)
+                solution.add_unassigned_job(job)
+                removed.append(job)
+
+        return removed
+
+    def random_removal(self, solution, num_jobs):
+        jobs = sorted(solution.job_locations)
+        return self.remove(solution, self.random.sample(jobs, min(num_jobs, len(jobs))))
+
+    def related_removal(self, solution, num_jobs):
+        # a random job together with its closest routed neighbours
+        jobs = sorted(solution.job_locations)
+        if not jobs:
+            return []
+        seed_job = self.random.choice(jobs)
+        related = [seed_job] + [job for job in self.problem.get_neighbours(seed_job) if job in solution.job_locations]
+        return self.remove(solution, related[:num_jobs])
+
+    def route_removal(self, solution, num_jobs):
+        # all jobs of a short route, which lets the repair reduce the number of vehicles
+        routes = [route for route in solution.routes if len(route.jobs) > 0]
+        if not routes:
+            return []
+        routes.sort(key=lambda route: len(route.jobs))
+        route = self.random.choice(routes[:max(1, len(routes) // 4)])
+        return self.remove(solution, route.jobs.tolist())
+
+    def get_score(self, deltas):
+        return get_score(self.weights, deltas)
+
+    def repair(self, solution, removed):
+        # greedy insertion next to granular neighbours or into the first empty route
+        self.random.shuffle(removed)
+        for job in removed + sorted(set(solution.unassigned_jobs) - set(removed)):
+            best_move, best_score = None, None
+            for neighbour in self.problem.get_neighbours(job)[:self.granularity]:
+                if neighbour not in solution.job_locations:
+                    continue
+                for op in [self.inject_bef_op, self.inject_aft_op]:
+                    if op.check(neighbour, job):
+                        score = self.get_score(op.delta(neighbour, job))
+                        if best_score is None or score < best_score:
+                            best_move, best_score = (op, neighbour), score
+
+            empty_route = next((route for route in solution.routes if len(route.jobs) == 0), None)
+            if empty_route is not None and solution.check_insertion(empty_route, 0, job):
+                score = self.get_score(solution.insertion_delta(empty_route, 0, job))
+                if best_score is None or score < best_score:
+                    best_move, best_score = (None, empty_route), score
+
+            if best_move is not None:
+                op, target = best_move
+                if op is None:
+                    solution.remove_unassigned_job(job)
+                    solution.insert_job(target, 0, job)
+                else:
+                    op.move(target, job)
@@ -0,0 +1,53 @@
+def get_weights(problem, weights=None):
+    # objectives are scalarised with decreasing weights so that earlier objectives dominate
+    num_objectives = len(problem.model.objectives)
+    return weights if weights is not None else [1000.0 ** (num_objectives - 1 - i) for i in range(num_objectives)]
+
+
+def get_score(weights, deltas):
+    return sum(weight * delta for weight, delta in zip(weights, deltas) if delta is not None)
+
+
+def needs_solution_check(problem):
+    # constraints without a route function can only be checked on the whole solution
+    return any(getattr(constraint, "route_function", None) is None for constraint in problem.model.constraints)
+
+
+def try_insertion(solution, route, index, job, check_solution):
+    # applies the insertion to check it when a constraint cannot decide it without mutating the solution
+    solution.insert_job(route, index, job)
+    feasible = solution.eval_route_constraint(route) and (not check_solution or solution.eval_constraint())
+    solution.rollback()
+    return feasible
+
+
+def get_insertion(solution, route, job, weights, check_solution):
+    # the best position of job in route as (score, index), None if it fits nowhere
+    best = None
+    for index in range(len(route.jobs) + 1):
+        feasible = solution.check_insertion(route, index, job)
+        if feasible is None:
+            feasible = try_insertion(solution, route, index, job, check_solution)
+        if feasible:
+            score = get_score(weights, solution.insertion_delta(route, index, job))
+            if best is None or score < best[0]:
+                best = (score, index)
+
+    return best
+
+
+def insert(solution, route, index, job, check_solution, new_route=False):
+    """
+    inserts the unassigned job into route, which is added to the solution first if it is a new route, and commits
+    the insertion if the constraints hold, otherwise it is rolled back and False is returned
+    """
+    if new_route:
+        solution.add_route(route)
+    solution.remove_unassigned_job(job)
+    solution.insert_job(route, index, job)
+    if not solution.eval_route_constraint(route) or (check_solution and not solution.eval_constraint()):
+        solution.rollback()
+        return False
+
+    solution.commit()
+    return True
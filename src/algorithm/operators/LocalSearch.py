@@ -2,6 +2,29 @@ from src.core.Solution import Route
 import logging
 
 
+def inject_delta(solution, a, b, offset):
+    # objective deltas of injecting job b at offset 0 (before) or 1 (after) job a, None for undecidable objectives
+    route_a, index_a = solution.locate_job(a)
+    route_b, index_b = solution.locate_job(b)
+    if route_a is None or route_a is route_b:
+        return [None] * len(solution.problem.model.objectives)
+
+    deltas = solution.insertion_delta(route_a, index_a + offset, b)
+    if route_b is not None:
+        removal_deltas = solution.removal_delta(route_b, index_b)
+        deltas = [None if delta is None or removal_delta is None else delta + removal_delta
+                  for delta, removal_delta in zip(deltas, removal_deltas)]
+
+    return deltas
+
+
+def record_move(operator):
+    # counts the move in the profiler of the problem if one is attached, accepted or rejected by the next commit or rollback
+    profiler = operator.solution.problem.profiler
+    if profiler is not None:
+        profiler.record_move(getattr(operator, "name", operator.__class__.__name__))
+
+
 class CreateRoute:
     """
     this operator creates a new route
@@ -14,17 +37,23 @@ class CreateRoute:
             self.solution = solution
 
     def create(self, vehicle_idx, jobs):
-        logging.debug(f"{self.__class__.__name__}::trying to create route: vehicle {vehicle_idx}, jobs: {jobs}")
+        logging.debug("%s::trying to create route: vehicle %s, jobs: %s", self.__class__.__name__, vehicle_idx, jobs)
+        record_move(self)
+        touched_routes = []
         for job in jobs:
             if job in self.solution.unassigned_jobs:
-                self.solution.unassigned_jobs.remove(job)
+                self.solution.remove_unassigned_job(job)
             else:
-                for route in self.solution.routes:
-                    if job in route.jobs:
-                        route.jobs.remove(job)
-                        break
+                route, index = self.solution.locate_job(job)
+                if route is not None:
+                    self.solution.remove_job(route, index)
+                    touched_routes.append(route)
 
-        self.solution.routes.append(Route(vehicle_idx, jobs))
+        route = Route(vehicle_idx, jobs)
+        self.solution.add_route(route)
+        touched_routes.append(route)
+
+        return touched_routes
 
 
 class InjectBefore:
@@ -38,23 +67,47 @@ class InjectBefore:
         else:
             self.solution = solution
 
+    def check(self, a, b):
+        """
+        checks the feasibility of injecting an unassigned job b before job a without applying the move,
+        returns None if it cannot be decided
+        """
+        if b not in self.solution.unassigned_jobs:
+            return None
+
+        route, index = self.solution.locate_job(a)
+        if route is None:
+            return None
+
+        return self.solution.check_insertion(route, index, b)
+
+    def delta(self, a, b):
+        """
+        returns the objective deltas of injecting job b before job a without applying the move
+        """
+        return inject_delta(self.solution, a, b, 0)
+
     def move(self, a, b):
-        logging.debug(f"{self.__class__.__name__}::trying to inject job {b} before job {a}")
+        logging.debug("%s::trying to inject job %s before job %s", self.__class__.__name__, b, a)
+        record_move(self)
         # remove b from unassigned jobs or the other route
+        touched_routes = []
         if b in self.solution.unassigned_jobs:
-            self.solution.unassigned_jobs.remove(b)
+            self.solution.remove_unassigned_job(b)
         else:
-            for route in self.solution.routes:
-                if b in route.jobs:
-                    route.jobs.remove(b)
-                    break
+            route, index = self.solution.locate_job(b)
+            if route is not None:
+                self.solution.remove_job(route, index)
+                touched_routes.append(route)
 
         # insert b to the index at a
-        for route in self.solution.routes:
-            for index, job in enumerate(route.jobs):
-                if job == a:
-                    route.jobs.insert(index, b)
-                    break
+        route, index = self.solution.locate_job(a)
+        if route is not None:
+            self.solution.insert_job(route, index, b)
+            if route not in touched_routes:
+                touched_routes.append(route)
+
+        return touched_routes
 
 
 class InjectAfter:
@@ -68,22 +121,127 @@ class InjectAfter:
         else:
             self.solution = solution
 
+    def check(self, a, b):
+        """
+        checks the feasibility of injecting an unassigned job b after job a without applying the move,
+        returns None if it cannot be decided
+        """
+        if b not in self.solution.unassigned_jobs:
+            return None
+
+        route, index = self.solution.locate_job(a)
+        if route is None:
+            return None
+
+        return self.solution.check_insertion(route, index + 1, b)
+
+    def delta(self, a, b):
+        """
+        returns the objective deltas of injecting job b after job a without applying the move
+        """
+        return inject_delta(self.solution, a, b, 1)
+
     def move(self, a, b):
-        logging.debug(f"{self.__class__.__name__}::trying to inject job {b} after job {a}")
+        logging.debug("%s::trying to inject job %s after job %s", self.__class__.__name__, b, a)
+        record_move(self)
         # remove b from unassigned jobs or the other route
+        touched_routes = []
         if b in self.solution.unassigned_jobs:
-            self.solution.unassigned_jobs.remove(b)
+            self.solution.remove_unassigned_job(b)
         else:
-            for route in self.solution.routes:
-                if b in route.jobs:
-                    route.jobs.remove(b)
-                    break
+            route, index = self.solution.locate_job(b)
+            if route is not None:
+                self.solution.remove_job(route, index)
+                touched_routes.append(route)
 
         # insert b to the index after a
-        for route in self.solution.routes:
-            for index, job in enumerate(route.jobs):
-                if job == a:
-                    route.jobs.insert(index + 1, b)
-                    break
+        route, index = self.solution.locate_job(a)
+        if route is not None:
+            self.solution.insert_job(route, index + 1, b)
+            if route not in touched_routes:
+                touched_routes.append(route)
+
+        return touched_routes
+
+
+class Swap:
+    """
+    this operator swaps the positions of job a and job b
+    """
+    def __init__(self, solution, **kwargs):
+        if not solution:
+            logging.error(f"{self.__class__.__name__}::solution is undefined")
+            exit(1)
+        else:
+            self.solution = solution
+
+    def move(self, a, b):
+        logging.debug("%s::trying to swap job %s and job %s", self.__class__.__name__, a, b)
+        record_move(self)
+        route_a, index_a = self.solution.locate_job(a)
+        route_b, index_b = self.solution.locate_job(b)
+        if route_a is None or route_b is None:
+            return []
+
+        self.solution.replace_job(route_a, index_a, b)
+        self.solution.replace_job(route_b, index_b, a)
+
+        return [route_a] if route_a is route_b else [route_a, route_b]
+
+
+class TwoOptStar:
+    """
+    this operator connects job a to job b in another route by exchanging the tails of both routes,
+    the route of a continues with b and its successors while the route of b continues with the successors of a
+    """
+    def __init__(self, solution, **kwargs):
+        if not solution:
+            logging.error(f"{self.__class__.__name__}::solution is undefined")
+            exit(1)
+        else:
+            self.solution = solution
+
+    def move(self, a, b):
+        logging.debug("%s::trying to connect job %s to job %s", self.__class__.__name__, a, b)
+        record_move(self)
+        route_a, index_a = self.solution.locate_job(a)
+        route_b, index_b = self.solution.locate_job(b)
+        if route_a is None or route_b is None or route_a is route_b:
+            return []
+
+        tail_a = self.solution.remove_segment(route_a, index_a + 1, len(route_a.jobs))
+        tail_b = self.solution.remove_segment(route_b, index_b, len(route_b.jobs))
+        self.solution.insert_segment(route_a, len(route_a.jobs), tail_b)
+        self.solution.insert_segment(route_b, len(route_b.jobs), tail_a)
+
+        return [route_a, route_b]
+
+
+class OrOpt:
+    """
+    this operator moves the segment of consecutive jobs starting at job a after job b
+    """
+    def __init__(self, solution, **kwargs):
+        if not solution:
+            logging.error(f"{self.__class__.__name__}::solution is undefined")
+            exit(1)
+        else:
+            self.solution = solution
+            self.segment_length = kwargs.get("segment_length", 2)
+            self.name = f"{self.__class__.__name__}{self.segment_length}"
+
+    def move(self, a, b):
+        logging.debug("%s::trying to move %s jobs from job %s after job %s", self.__class__.__name__, self.segment_length, a, b)
+        record_move(self)
+        route_a, index_a = self.solution.locate_job(a)
+        route_b, index_b = self.solution.locate_job(b)
+        if route_a is None or route_b is None or index_a + self.segment_length > len(route_a.jobs):
+            return []
+        if route_a is route_b and index_a <= index_b < index_a + self.segment_length:
+            return []
 
+        segment = self.solution.remove_segment(route_a, index_a, index_a + self.segment_length)
+        route_b, index_b = self.solution.locate_job(b)
+        self.solution.insert_segment(route_b, index_b + 1, segment)
 
+        return [route_a] if route_a is route_b else [route_a, route_b]
@@ -0,0 +1,130 @@
+from src.core.LazyMatrix import LazyMatrix
+import numpy as np
+
+
+class BatchEvaluator:
+    """
+    evaluates distance, time, load and time window/capacity violations of many routes or solutions at once,
+    routes are encoded as integer arrays padded with -1 and evaluated position by position in the same order of
+    operations as the route functions of the model, so that the results match them exactly
+    """
+    def __init__(self, problem, **kwargs):
+        self.problem = problem
+        # attribute names default to the ones of the homberger model and can be remapped by keyword
+        def get_attr(name):
+            return getattr(problem.model, kwargs.get(name, name))
+
+        self.cost = problem.get_node_node_attr_array(get_attr("cost"))
+        self.demand = problem.get_node_attr_array(get_attr("demand"))
+        self.ready_time = problem.get_node_attr_array(get_attr("ready_time"))
+        self.due_time = problem.get_node_attr_array(get_attr("due_time"))
+        self.service_time = problem.get_node_attr_array(get_attr("service_time"))
+        self.capacity = problem.get_vehicle_attr_array(get_attr("capacity"))
+        self.start_time = problem.get_vehicle_attr_array(get_attr("start_time"))
+        self.end_time = problem.get_vehicle_attr_array(get_attr("end_time"))
+        self.depot_index = problem.get_vehicle_attr_array(get_attr("depot_index"))
+
+    def get_costs(self, from_nodes, to_nodes):
+        if isinstance(self.cost, LazyMatrix):
+            return self.cost.get_pairs(from_nodes, to_nodes)
+        return self.cost[from_nodes, to_nodes]
+
+    @staticmethod
+    def encode(solutions):
+        """
+        encodes solutions into jobs of shape [S, R, L] and vehicles of shape [S, R], padded with -1
+        """
+        num_routes = max([len(solution.routes) for solution in solutions] + [1])
+        num_jobs = max([len(route.jobs) for solution in solutions for route in solution.routes] + [1])
+        jobs = np.full((len(solutions), num_routes, num_jobs), -1, dtype=np.int32)
+        vehicles = np.full((len(solutions), num_routes), -1, dtype=np.int32)
+        for solution_idx, solution in enumerate(solutions):
+            for route_idx, route in enumerate(solution.routes):
+                jobs[solution_idx, route_idx, :len(route.jobs)] = route.jobs
+                vehicles[solution_idx, route_idx] = route.vehicle_idx
+
+        return jobs, vehicles
+
+    def evaluate_routes(self, jobs, vehicles):
+        """
+        evaluates routes given as jobs of shape [R, L] and vehicles of shape [R], returns a dict of arrays of shape [R]
+        """
+        jobs = np.asarray(jobs)
+        vehicles = np.asarray(vehicles)
+        num_routes = len(jobs)
+        is_route = vehicles >= 0
+        vehicles = np.where(is_route, vehicles, 0)
+        depots = self.depot_index[vehicles]
+
+        distance = np.zeros(num_routes)
+        route_time = np.zeros(num_routes)
+        load = np.zeros(num_routes)
+        leave_time = self.start_time[vehicles].astype(float)
+        prev_nodes = depots.copy()
+        time_window_violated = np.zeros(num_routes, dtype=bool)
+        capacity_violated = np.zeros(num_routes, dtype=bool)
+        capacity = self.capacity[vehicles]
+
+        for position in range(jobs.shape[1]):
+            nodes = jobs[:, position]
+            active = (nodes >= 0) & is_route
+            if not active.any():
+                break
+            index = np.nonzero(active)[0]
+            current = nodes[index]
+            prev = prev_nodes[index]
+
+            cost = self.get_costs(prev, current)
+            arrival_time = leave_time[index] + cost
+            waiting_time = np.maximum(0, self.ready_time[current] - arrival_time)
+            time_window_violated[index] |= arrival_time > self.due_time[current]
+            leave_time[index] = arrival_time + waiting_time + self.service_time[current]
+            distance[index] += cost
+            route_time[index] += (cost + waiting_time + self.service_time[current])
+            load[index] += self.demand[current]
+            capacity_violated[index] |= load[index] > capacity[index]
+            prev_nodes[index] = current
+
+        # return to the depot for non-empty routes
+        num_jobs = (jobs >= 0).sum(axis=1) * is_route
+        index = np.nonzero(num_jobs > 0)[0]
+        return_cost = self.get_costs(prev_nodes[index], depots[index])
+        distance[index] += return_cost
+        route_time[index] += return_cost
+        time_window_violated[index] |= leave_time[index] + return_cost > self.end_time[vehicles[index]]
+
+        return {"distance": distance,
+                "time": route_time,
+                "load": load,
+                "num_jobs": num_jobs,
+                "time_window_violated": time_window_violated,
+                "capacity_violated": capacity_violated}
+
+    def evaluate_solutions(self, jobs, vehicles):
+        """
+        evaluates solutions given as jobs of shape [S, R, L] and vehicles of shape [S, R], returns a dict of arrays of
+        shape [S] with the objectives and the feasibility of each solution
+        """
+        jobs = np.asarray(jobs)
+        vehicles = np.asarray(vehicles)
+        num_solutions, num_routes, num_jobs = jobs.shape
+        routes = self.evaluate_routes(jobs.reshape(num_solutions * num_routes, num_jobs), vehicles.reshape(-1))
+        routes = {name: values.reshape(num_solutions, num_routes) for name, values in routes.items()}
+
+        # route totals are accumulated route by route as in the objective functions
+        distance = np.zeros(num_solutions)
+        solution_time = np.zeros(num_solutions)
+        for route_idx in range(num_routes):
+            distance += routes["distance"][:, route_idx]
+            solution_time += routes["time"][:, route_idx]
+
+        num_assigned = routes["num_jobs"].sum(axis=1)
+        return {"num_unassigned_jobs": len(self.problem.job_indexes) - num_assigned,
+                "num_vehicles": (routes["num_jobs"] > 0).sum(axis=1),
+                "distance": distance,
+                "time": solution_time,
+                "time_window_feasible": ~routes["time_window_violated"].any(axis=1),
+                "capacity_feasible": ~routes["capacity_violated"].any(axis=1)}
+
+    def evaluate(self, solutions):
+        return self.evaluate_solutions(*self.encode(solutions))
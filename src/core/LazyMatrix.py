@@ -0,0 +1,122 @@
+from collections import OrderedDict
+import math
+import numpy as np
+
+
+class LazyMatrix:
+    """
+    node-node attribute evaluated on demand one row at a time, only the most recently used rows are kept in memory
+    """
+    def __init__(self, row_function, num_nodes, cache_size=1024):
+        self.row_function = row_function
+        self.shape = (num_nodes, num_nodes)
+        self.cache_size = cache_size
+        self.rows = OrderedDict()
+
+    def get_row(self, x):
+        row = self.rows.get(x)
+        if row is None:
+            row = self.row_function(x)
+            self.rows[x] = row
+            if len(self.rows) > self.cache_size:
+                self.rows.popitem(last=False)
+        else:
+            self.rows.move_to_end(x)
+
+        return row
+
+    def get_block(self, start, stop):
+        # rows evaluated in bulk without going through the cache, used by full scans such as neighbour lists
+        return np.stack([self.row_function(x) for x in range(start, stop)])
+
+    def item(self, x, y):
+        return self.get_row(x).item(y)
+
+    def get_pairs(self, xs, ys):
+        # entries for arrays of row and column indexes, as matrix[xs, ys] for a dense array
+        return np.array([self.item(x, y) for x, y in zip(xs.tolist(), ys.tolist())], dtype=float)
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            return self.item(*key)
+        if isinstance(key, slice):
+            return self.get_block(*key.indices(self.shape[0])[:2])
+        return self.get_row(key)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def as_row_views(self):
+        return RowViews(self)
+
+    def get_subset(self, node_indexes):
+        # lazy matrix over a subset of the nodes, its rows are the rows of this matrix restricted to the subset
+        node_indexes = np.asarray(node_indexes)
+        return LazyMatrix(lambda x: self.row_function(node_indexes[x])[node_indexes], len(node_indexes), self.cache_size)
+
+    def add_node(self, value=None):
+        # the row function covers the new node, cached rows are one entry short and are evaluated again
+        self.shape = (self.shape[0] + 1, self.shape[1] + 1)
+        self.rows.clear()
+
+
+class RowViews:
+    """
+    view of a lazy matrix whose rows are memoryviews of the cached row arrays, indexed as rows[x][y] by compiled
+    accessors, which returns python numbers without copying the rows into lists
+    """
+    def __init__(self, matrix):
+        self.matrix = matrix
+        self.cache_size = matrix.cache_size
+        self.rows = OrderedDict()
+
+    def __getitem__(self, x):
+        row = self.rows.get(x)
+        if row is None:
+            row = memoryview(self.matrix.get_row(x))
+            self.rows[x] = row
+            if len(self.rows) > self.cache_size:
+                self.rows.popitem(last=False)
+        else:
+            self.rows.move_to_end(x)
+
+        return row
+
+    def __len__(self):
+        return len(self.matrix)
+
+
+class EuclideanMatrix(LazyMatrix):
+    """
+    euclidean distances between node coordinates, single entries that miss the row cache are computed directly
+    """
+    def __init__(self, xs, ys, cache_size=1024):
+        self.xs = np.asarray(xs, dtype=float)
+        self.ys = np.asarray(ys, dtype=float)
+        LazyMatrix.__init__(self, self.calc_row, len(self.xs), cache_size)
+
+    def calc_row(self, x):
+        return np.sqrt((self.xs - self.xs[x]) ** 2 + (self.ys - self.ys[x]) ** 2)
+
+    def item(self, x, y):
+        row = self.rows.get(x)
+        if row is not None:
+            return row.item(y)
+
+        return math.sqrt((self.xs.item(y) - self.xs.item(x)) ** 2 + (self.ys.item(y) - self.ys.item(x)) ** 2)
+
+    def get_pairs(self, xs, ys):
+        return np.sqrt((self.xs[ys] - self.xs[xs]) ** 2 + (self.ys[ys] - self.ys[xs]) ** 2)
+
+    def get_subset(self, node_indexes):
+        return EuclideanMatrix(self.xs[node_indexes], self.ys[node_indexes], self.cache_size)
+
+    def add_node(self, value=None):
+        # value holds the (x, y) coordinates of the new node
+        x, y = value
+        self.xs = np.append(self.xs, x)
+        self.ys = np.append(self.ys, y)
+        LazyMatrix.add_node(self)
+
+    def get_block(self, start, stop):
+        return np.sqrt((self.xs[start:stop, None] - self.xs[None, :]) ** 2 + (self.ys[start:stop, None] - self.ys[None, :]) ** 2)
@@ -30,9 +30,34 @@ class VehicleNodeNodeAttr(Attr):
 
 
 class Objective:
-    def __init__(self, function, name="Objective"):
+    """
+    an objective of the solution, the optional delta functions return the change of the objective when an unassigned
+    job is inserted into a route or a job is removed from a route, without applying the move. the optional route
+    function returns the contribution of a single route for objectives that sum over routes
+    """
+    def __init__(self, function, name="Objective", insertion_delta=None, removal_delta=None, route_function=None):
         self.function = function
         self.name = name
+        self.insertion_delta = insertion_delta
+        self.removal_delta = removal_delta
+        self.route_function = route_function
+
+
+class Constraint:
+    """
+    a constraint on the whole solution, the optional route function checks a single route so that only the
+    routes touched by an operator need to be re-evaluated. the optional insertion function answers whether a job
+    can be inserted into a feasible route from a profile precomputed by the profile function, without mutating it
+    """
+    def __init__(self, function, name="Constraint", route_function=None, profile_function=None, insertion_function=None):
+        self.function = function
+        self.name = name
+        self.route_function = route_function
+        self.profile_function = profile_function
+        self.insertion_function = insertion_function
+
+    def __call__(self, solution):
+        return self.function(solution)
 
 
 class Model:
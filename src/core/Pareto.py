@@ -0,0 +1,189 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def compare(objectives1, objectives2, mode="lexicographic", tolerance=0.0):
+    """
+    compares two objective vectors to be minimised, returns -1 if the first is better, 1 if the second is better and
+    0 otherwise, lexicographic mode decides by the first objective that differs by more than tolerance and pareto mode
+    only decides if one vector dominates the other
+    """
+    if mode == "lexicographic":
+        for value1, value2 in zip(objectives1, objectives2):
+            if value1 < value2 - tolerance:
+                return -1
+            if value1 > value2 + tolerance:
+                return 1
+        return 0
+
+    if mode == "pareto":
+        better = worse = False
+        for value1, value2 in zip(objectives1, objectives2):
+            if value1 < value2 - tolerance:
+                better = True
+            elif value1 > value2 + tolerance:
+                worse = True
+        if better == worse:
+            return 0
+        return -1 if better else 1
+
+    raise ValueError(f"unknown comparison mode: {mode}")
+
+
+def dominates(objectives1, objectives2):
+    # the first vector is no worse in every objective and better in at least one
+    return compare(objectives1, objectives2, "pareto") == -1
+
+
+def get_domination_matrix(objectives, block_size=None):
+    # dominated[i, j] is True if i dominates j, built in blocks of rows to bound the intermediate arrays
+    objectives = np.asarray(objectives, dtype=float)
+    num_points = len(objectives)
+    if block_size is None:
+        block_size = max(1, (1 << 24) // max(num_points, 1))
+
+    # one objective at a time keeps the comparisons on contiguous two-dimensional blocks
+    dominated = np.empty((num_points, num_points), dtype=bool)
+    for start in range(0, num_points, block_size):
+        stop = min(start + block_size, num_points)
+        no_worse = np.ones((stop - start, num_points), dtype=bool)
+        better = np.zeros((stop - start, num_points), dtype=bool)
+        for values in objectives.T:
+            no_worse &= values[start:stop, None] <= values[None, :]
+            better |= values[start:stop, None] < values[None, :]
+        dominated[start:stop] = no_worse & better
+    return dominated
+
+
+def fast_non_dominated_sort(objectives):
+    """
+    sorts objective vectors, one row per point, into fronts and returns the rank of every point, rank 0 is the
+    non-dominated set and every later front is only dominated by earlier ones
+    """
+    dominated = get_domination_matrix(objectives)
+    num_dominators = dominated.sum(axis=0)
+    ranks = np.full(len(num_dominators), -1, dtype=np.int64)
+    front = np.nonzero(num_dominators == 0)[0]
+    rank = 0
+    while len(front) > 0:
+        ranks[front] = rank
+        # removing the front releases the points it dominated
+        num_dominators -= dominated[front].sum(axis=0)
+        num_dominators[front] = -1
+        front = np.nonzero(num_dominators == 0)[0]
+        rank += 1
+
+    return ranks
+
+
+def get_fronts(objectives):
+    ranks = fast_non_dominated_sort(objectives)
+    return [np.nonzero(ranks == rank)[0] for rank in range(ranks.max() + 1)] if len(ranks) > 0 else []
+
+
+def calc_crowding_distance(objectives):
+    # distance of every point of a front to its neighbours along each objective, the extremes are kept at infinity
+    objectives = np.asarray(objectives, dtype=float)
+    num_points, num_objectives = objectives.shape
+    distances = np.zeros(num_points)
+    if num_points <= 2:
+        distances[:] = np.inf
+        return distances
+
+    for i in range(num_objectives):
+        order = np.argsort(objectives[:, i], kind="stable")
+        values = objectives[order, i]
+        distances[order[0]] = distances[order[-1]] = np.inf
+        span = values[-1] - values[0]
+        if span > 0:
+            distances[order[1:-1]] += (values[2:] - values[:-2]) / span
+
+    return distances
+
+
+class ParetoArchive:
+    """
+    non-dominated set of feasible solutions, the objectives of the members are kept in one array so that a candidate
+    is checked against all of them at once, with max_size the most crowded members are dropped first
+    """
+    def __init__(self, max_size=None, tolerance=0.0):
+        self.max_size = max_size
+        self.tolerance = tolerance
+        self.solutions = []
+        self.objectives = None
+
+    def is_dominated(self, objectives):
+        # a candidate is rejected if a member dominates it or has the same objectives
+        if not self.solutions:
+            return False
+
+        candidate = np.asarray(objectives, dtype=float)
+        no_worse = (self.objectives <= candidate + self.tolerance).all(axis=1)
+        return bool(no_worse.any())
+
+    def add(self, solution):
+        """
+        adds a copy of a feasible solution unless it is dominated, drops the members it dominates and returns
+        whether it was added
+        """
+        if not solution.is_feasible or self.is_dominated(solution.objectives_output):
+            return False
+
+        candidate = np.asarray(solution.objectives_output, dtype=float)
+        if self.solutions:
+            kept = ~((candidate <= self.objectives).all(axis=1) & (candidate < self.objectives).any(axis=1))
+            self.solutions = [member for member, keep in zip(self.solutions, kept.tolist()) if keep]
+            self.objectives = np.vstack([self.objectives[kept], candidate])
+        else:
+            self.objectives = candidate[None, :]
+        self.solutions.append(solution.copy())
+        self.truncate()
+
+        return True
+
+    def add_all(self, solutions):
+        # adds many candidates at once with one non-dominated sort over the members and the candidates
+        candidates = [solution for solution in solutions if solution.is_feasible]
+        if not candidates:
+            return 0
+
+        members = self.solutions + candidates
+        objectives = np.array([solution.objectives_output for solution in candidates], dtype=float)
+        if self.solutions:
+            objectives = np.vstack([self.objectives, objectives])
+        front = np.nonzero(fast_non_dominated_sort(objectives) == 0)[0]
+        # points with equal objectives are all non-dominated, only the first one is kept
+        _, first = np.unique(objectives[front], axis=0, return_index=True)
+        front = np.sort(front[first])
+
+        num_members = len(self.solutions)
+        self.solutions = [members[index] if index < num_members else members[index].copy() for index in front.tolist()]
+        self.objectives = objectives[front]
+        self.truncate()
+
+        return int((front >= num_members).sum())
+
+    def truncate(self):
+        if self.max_size is None or len(self.solutions) <= self.max_size:
+            return
+
+        order = np.argsort(-calc_crowding_distance(self.objectives), kind="stable")
+        kept = np.sort(order[:self.max_size])
+        self.solutions = [self.solutions[index] for index in kept.tolist()]
+        self.objectives = self.objectives[kept]
+
+    def get_best(self, weights=None):
+        # the lexicographic best member, or the one with the lowest weighted sum of objectives
+        if not self.solutions:
+            return None
+        if weights is None:
+            return self.solutions[int(np.lexsort(self.objectives.T[::-1])[0])]
+        return self.solutions[int(np.argmin(self.objectives @ np.asarray(weights, dtype=float)))]
+
+    def __len__(self):
+        return len(self.solutions)
+
+    def __iter__(self):
+        return iter(self.solutions)
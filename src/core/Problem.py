@@ -1,53 +1,267 @@
+from src.core.Model import NodeNodeAttr
+from src.core.VehicleMatrices import VehicleMatrices
 import logging
+import bisect
+import heapq
+import time
+
+try:
+    import numpy as np
+    from src.core.LazyMatrix import LazyMatrix, RowViews
+    from src.core.SpatialIndex import SpatialIndex
+except ImportError:
+    np = None
+
+
+def get_row_views(matrix):
+    # rows of a matrix as memoryviews, the rows share the memory of the matrix and return python numbers
+    if isinstance(matrix, LazyMatrix):
+        return matrix.as_row_views()
+    return [memoryview(row) for row in matrix]
+
+
+class CompiledAttrs:
+    """
+    direct accessors of the attributes of a problem, one per attribute name, indexed like the getters
+    e.g. compiled.cost[node_idx1][node_idx2] or compiled.demand[node_idx]
+    """
+    pass
 
 
 class Problem:
-    def __init__(self, model, depot_indexes, global_attrs, vehicles_with_attrs, nodes_with_attrs, node_node_attrs, vehicle_node_node_attrs):
+    def __init__(self, model, depot_indexes, global_attrs, vehicles_with_attrs, nodes_with_attrs, node_node_attrs, vehicle_node_node_attrs, storage="list"):
+        self.setup(model, depot_indexes, global_attrs, len(vehicles_with_attrs), len(nodes_with_attrs), storage)
+        if storage == "array":
+            vehicle_attrs = {attr.name: [vehicle_attrs[attr.name] for vehicle_attrs in vehicles_with_attrs] for attr in self.model.vehicle_attrs}
+            node_attrs = {attr.name: [node_attrs[attr.name] for node_attrs in nodes_with_attrs] for attr in self.model.node_attrs}
+            self.set_attr_arrays(vehicle_attrs, node_attrs, node_node_attrs, vehicle_node_node_attrs)
+        elif storage == "list":
+            self.vehicle_attrs_tensor = [[vehicle_attrs[attr.name] for attr in self.model.vehicle_attrs] for vehicle_attrs in vehicles_with_attrs]
+            self.node_attrs_tensor = [[node_attrs[attr.name] for attr in self.model.node_attrs] for node_attrs in nodes_with_attrs]
+            self.node_node_attrs_tensor = [[[node_node_attrs[attr.name][x][y] for attr in self.model.node_node_attrs] for y in range(self.num_nodes)] for x in range(self.num_nodes)]
+            self.set_vehicle_matrices(vehicle_node_node_attrs)
+        else:
+            logging.error(f"{self.__class__.__name__}::unknown storage: {storage}")
+            exit(1)
+
+        logging.info(f"{self.__class__.__name__}::num of vehicles in problem: {self.num_vehicles}")
+        logging.info(f"{self.__class__.__name__}::num of nodes in problem: {self.num_nodes}")
+
+    @classmethod
+    def from_arrays(cls, model, depot_indexes, global_attrs, vehicle_attrs, node_attrs, node_node_attrs, vehicle_node_node_attrs, num_vehicles, num_nodes):
+        """
+        creates a problem with array storage directly from one array per attribute, e.g. node_attrs["demand"] of
+        shape [N] or node_node_attrs["cost"] of shape [N, N], the arrays are used without copying where possible
+        """
+        problem = cls.__new__(cls)
+        problem.setup(model, depot_indexes, global_attrs, num_vehicles, num_nodes, "array")
+        problem.set_attr_arrays(vehicle_attrs, node_attrs, node_node_attrs, vehicle_node_node_attrs)
+
+        logging.info(f"{cls.__name__}::num of vehicles in problem: {problem.num_vehicles}")
+        logging.info(f"{cls.__name__}::num of nodes in problem: {problem.num_nodes}")
+        return problem
+
+    def __getstate__(self):
+        # the compiled accessors hold memoryviews, which cannot be pickled, a copy compiles them again on first use
+        state = self.__dict__.copy()
+        state["compiled"] = None
+        return state
+
+    def setup(self, model, depot_indexes, global_attrs, num_vehicles, num_nodes, storage):
         self.model = model
         self.closeness = None
         self.neighbour_array = None
+        self.spatial_index = None
+        self.spatial_attrs = None
+        self.compiled = None
+        self.profiler = None
 
-        self.num_vehicles = len(vehicles_with_attrs)
-        self.num_nodes = len(nodes_with_attrs)
+        self.num_vehicles = num_vehicles
+        self.num_nodes = num_nodes
         self.depot_index_list = depot_indexes
         self.job_indexes = list(range(len(depot_indexes), self.num_nodes))
+        self.vehicle_indexes = list(range(self.num_vehicles))
+        # removed nodes keep their index so that the attributes of the other nodes do not move
+        self.inactive_nodes = set()
 
+        self.storage = storage
         self.global_attrs_tensor = [global_attrs[attr.name] for attr in self.model.global_attrs]
-        self.vehicle_attrs_tensor = [[vehicle_attrs[attr.name] for attr in self.model.vehicle_attrs] for vehicle_attrs in vehicles_with_attrs]
-        self.node_attrs_tensor = [[node_attrs[attr.name] for attr in self.model.node_attrs] for node_attrs in nodes_with_attrs]
-        self.node_node_attrs_tensor = [[[node_node_attrs[attr.name][x][y] for attr in self.model.node_node_attrs] for y in range(self.num_nodes)] for x in range(self.num_nodes)]
-        self.vehicle_node_node_attr_tensor = [[[[vehicle_node_node_attrs[attr.name][v][x][y] for attr in self.model.vehicle_node_node_attrs] for y in range(self.num_nodes)] for x in range(self.num_nodes)] for v in range(self.num_vehicles)]
 
-        logging.info(f"{self.__class__.__name__}::num of vehicles in problem: {self.num_vehicles}")
-        logging.info(f"{self.__class__.__name__}::num of nodes in problem: {self.num_nodes}")
+    def set_attr_arrays(self, vehicle_attrs, node_attrs, node_node_attrs, vehicle_node_node_attrs):
+        if np is None:
+            logging.error(f"{self.__class__.__name__}::numpy is required for array storage")
+            exit(1)
+
+        # one contiguous array per attribute, indexed by attr.index
+        self.vehicle_attr_arrays = [np.asarray(vehicle_attrs[attr.name]) for attr in self.model.vehicle_attrs]
+        self.node_attr_arrays = [np.asarray(node_attrs[attr.name]) for attr in self.model.node_attrs]
+        # lazy matrices are kept as they are and evaluated on demand
+        self.node_node_attr_arrays = [node_node_attrs[attr.name] if isinstance(node_node_attrs[attr.name], LazyMatrix) else np.asarray(node_node_attrs[attr.name])
+                                      for attr in self.model.node_node_attrs]
+        # spare capacity of the node-node arrays, allocated once nodes are added
+        self.node_node_attr_buffers = [None] * len(self.node_node_attr_arrays)
+        self.set_vehicle_matrices(vehicle_node_node_attrs)
+
+    def set_vehicle_matrices(self, vehicle_node_node_attrs):
+        """
+        stores every vehicle-node-node attribute once per distinct vehicle profile, an attribute is either given as a
+        VehicleMatrices or as one matrix per vehicle, in which case vehicles with identical matrices share a profile
+        """
+        self.vehicle_node_node_attr_matrices = []
+        for attr in self.model.vehicle_node_node_attrs:
+            values = vehicle_node_node_attrs[attr.name]
+            matrices = values if isinstance(values, VehicleMatrices) else VehicleMatrices.from_dense(values)
+            if self.storage == "array":
+                profiles = [np.asarray(profile) for profile in matrices.profiles]
+            else:
+                profiles = [profile.tolist() if hasattr(profile, "tolist") else [list(row) for row in profile] for profile in matrices.profiles]
+            self.vehicle_node_node_attr_matrices.append(VehicleMatrices(profiles, matrices.vehicle_profiles, matrices.overrides))
+
+    def compile(self):
+        """
+        binds every attribute of the model once so that hot loops index it directly instead of resolving the attribute
+        on every call, vehicle and node attributes are bound as python lists and the matrices of array storage as lists
+        of memoryviews over their rows, which index like nested lists without copying the matrix
+        """
+        if self.compiled is not None:
+            return self.compiled
+
+        compiled = CompiledAttrs()
+        for attr in self.model.global_attrs:
+            setattr(compiled, attr.name, self.get_global_attr(attr))
+
+        if self.storage == "array":
+            for attr in self.model.vehicle_attrs:
+                setattr(compiled, attr.name, self.vehicle_attr_arrays[attr.index].tolist())
+            for attr in self.model.node_attrs:
+                setattr(compiled, attr.name, self.node_attr_arrays[attr.index].tolist())
+            for attr in self.model.node_node_attrs:
+                setattr(compiled, attr.name, get_row_views(self.node_node_attr_arrays[attr.index]))
+        else:
+            for attr in self.model.vehicle_attrs:
+                setattr(compiled, attr.name, [attrs[attr.index] for attrs in self.vehicle_attrs_tensor])
+            for attr in self.model.node_attrs:
+                setattr(compiled, attr.name, [attrs[attr.index] for attrs in self.node_attrs_tensor])
+            for attr in self.model.node_node_attrs:
+                setattr(compiled, attr.name, [[attrs[attr.index] for attrs in row] for row in self.node_node_attrs_tensor])
+
+        for attr in self.model.vehicle_node_node_attrs:
+            setattr(compiled, attr.name, self.compile_vehicle_matrices(attr))
+
+        self.compiled = compiled
+        return self.compiled
+
+    def compile_vehicle_matrices(self, attr):
+        # one matrix per vehicle, vehicles of the same profile without overrides share the same rows
+        matrices = self.vehicle_node_node_attr_matrices[attr.index]
+        if not matrices.is_array:
+            return matrices.to_dense()
+
+        profiles = [get_row_views(profile) for profile in matrices.profiles]
+        return [get_row_views(matrices.get_matrix(vehicle_idx)) if matrices.overrides.get(vehicle_idx) else profiles[profile_idx]
+                for vehicle_idx, profile_idx in enumerate(matrices.vehicle_profiles)]
 
     def get_global_attr(self, attr):
         return self.global_attrs_tensor[attr.index]
 
     def get_vehicle_attr(self, vehicle_idx, attr):
+        if self.storage == "array":
+            return self.vehicle_attr_arrays[attr.index].item(vehicle_idx)
         return self.vehicle_attrs_tensor[vehicle_idx][attr.index]
 
     def get_node_attr(self, node_idx, attr):
+        if self.storage == "array":
+            return self.node_attr_arrays[attr.index].item(node_idx)
         return self.node_attrs_tensor[node_idx][attr.index]
 
     def get_node_node_attr(self, node_idx1, node_idx2, attr):
+        if self.storage == "array":
+            return self.node_node_attr_arrays[attr.index].item(node_idx1, node_idx2)
         return self.node_node_attrs_tensor[node_idx1][node_idx2][attr.index]
 
     def get_vehicle_node_node_attr(self, vehicle_idx, node_idx1, node_idx2, attr):
-        return self.vehicle_node_node_attr_tensor[vehicle_idx][node_idx1][node_idx2][attr.index]
+        return self.vehicle_node_node_attr_matrices[attr.index].item(vehicle_idx, node_idx1, node_idx2)
+
+    # direct views for vectorised constraints and objectives, only available with array storage
+    def get_vehicle_attr_array(self, attr):
+        self.check_array_storage()
+        return self.vehicle_attr_arrays[attr.index]
+
+    def get_node_attr_array(self, attr):
+        self.check_array_storage()
+        return self.node_attr_arrays[attr.index]
+
+    def get_node_node_attr_array(self, attr):
+        self.check_array_storage()
+        return self.node_node_attr_arrays[attr.index]
+
+    def get_vehicle_node_node_attr_array(self, attr):
+        # the profiles of the attribute as arrays, see VehicleMatrices
+        self.check_array_storage()
+        return self.vehicle_node_node_attr_matrices[attr.index]
+
+    def check_array_storage(self):
+        if self.storage != "array":
+            logging.error(f"{self.__class__.__name__}::attribute arrays are only available with array storage")
+            exit(1)
+
+    def set_profiler(self, profiler):
+        # solutions and solvers of the problem record their counters and timers into the profiler, None disables it
+        self.profiler = profiler
 
     def set_closeness(self, closeness):
+        # closeness is either a function of (problem, node_idx1, node_idx2) or a node-node attribute
         self.closeness = closeness
 
+    def set_spatial_index(self, x_attr, y_attr):
+        # index the nodes by their coordinate attributes, used for neighbour queries when closeness is not defined
+        if np is None:
+            logging.error(f"{self.__class__.__name__}::numpy is required for the spatial index")
+            exit(1)
+
+        xs = [self.get_node_attr(node_idx, x_attr) for node_idx in range(self.num_nodes)]
+        ys = [self.get_node_attr(node_idx, y_attr) for node_idx in range(self.num_nodes)]
+        self.spatial_index = SpatialIndex(xs, ys)
+        self.spatial_attrs = (x_attr, y_attr)
+
+    def get_nearest(self, node_idx, k):
+        # removed nodes stay in the spatial index, enough extra nodes are queried to skip them
+        index = self.spatial_index
+        nodes = index.query_knn(index.xs[node_idx], index.ys[node_idx], k + len(self.inactive_nodes), exclude=node_idx).tolist()
+        return [node for node in nodes if node not in self.inactive_nodes][:k]
+
+    def get_within(self, node_idx, radius):
+        index = self.spatial_index
+        nodes = index.query_radius(index.xs[node_idx], index.ys[node_idx], radius)
+        return [node for node in nodes.tolist() if node != node_idx and node not in self.inactive_nodes]
+
+    def get_neighbours(self, node_idx):
+        neighbours = self.neighbour_array[node_idx]
+        return neighbours if isinstance(neighbours, list) else neighbours.tolist()
+
     def update_neighbour(self, neighbourhood_size):
-        if self.closeness is not None:
+        start_time = time.perf_counter()
+        if self.closeness is None and self.spatial_index is not None:
+            logging.info(f"{self.__class__.__name__}::updating neighbourhood from spatial index with size: {neighbourhood_size}")
+            num_neighbours = min(neighbourhood_size, self.num_nodes - len(self.inactive_nodes) - 1)
+            self.neighbour_array = np.empty((self.num_nodes, num_neighbours), dtype=np.int32)
+            for node_idx in range(self.num_nodes):
+                self.neighbour_array[node_idx] = self.get_nearest(node_idx, num_neighbours)
+        elif isinstance(self.closeness, NodeNodeAttr) and self.storage == "array":
             logging.info(f"{self.__class__.__name__}::updating neighbourhood with size: {neighbourhood_size}")
+            self.update_neighbour_from_array(self.get_node_node_attr_array(self.closeness), neighbourhood_size)
+        elif self.closeness is not None:
+            logging.info(f"{self.__class__.__name__}::updating neighbourhood with size: {neighbourhood_size}")
+            closeness = self.closeness
+            if isinstance(closeness, NodeNodeAttr):
+                closeness = lambda problem, node_idx1, node_idx2: problem.get_node_node_attr(node_idx1, node_idx2, self.closeness)
+
             self.neighbour_array = []
             for node_idx in range(self.num_nodes):
                 cost_to_neighbour = []
                 for neighbour_idx in range(self.num_nodes):
-                    if node_idx != neighbour_idx:
-                        cost_to_neighbour.append((self.closeness(self, node_idx, neighbour_idx), neighbour_idx))
+                    if node_idx != neighbour_idx and neighbour_idx not in self.inactive_nodes:
+                        cost_to_neighbour.append((closeness(self, node_idx, neighbour_idx), neighbour_idx))
 
                 cost_to_neighbour.sort(key=lambda x: x[0])
                 neighbours = [cost[1] for cost in cost_to_neighbour]
@@ -58,3 +272,300 @@ class Problem:
         else:
             logging.error(f"{self.__class__.__name__}::closeness is not defined for the problem")
             exit(1)
+
+        if self.profiler is not None:
+            self.profiler.add_time("update_neighbour", time.perf_counter() - start_time)
+
+    def update_neighbour_from_array(self, closeness_array, neighbourhood_size, block_size=None):
+        # partial top-k selection over blocks of rows, ties are broken by node index as in the callback path
+        num_neighbours = min(neighbourhood_size, self.num_nodes - len(self.inactive_nodes) - 1)
+        self.neighbour_array = np.empty((self.num_nodes, num_neighbours), dtype=np.int32)
+        if num_neighbours <= 0:
+            return
+
+        if block_size is None:
+            block_size = max(1, (1 << 22) // self.num_nodes)
+        inactive_nodes = np.fromiter(sorted(self.inactive_nodes), dtype=np.int64, count=len(self.inactive_nodes))
+        for start in range(0, self.num_nodes, block_size):
+            stop = min(start + block_size, self.num_nodes)
+            rows = np.array(closeness_array[start:stop], dtype=float)
+            rows[np.arange(stop - start), np.arange(start, stop)] = np.inf
+            # removed nodes are never selected, the rows of the removed nodes themselves are kept filled
+            rows[:, inactive_nodes] = np.inf
+
+            # keep everything closer than the k-th value and fill up with the lowest indexes equal to it
+            kth = np.partition(rows, num_neighbours - 1, axis=1)[:, num_neighbours - 1:num_neighbours]
+            closer = rows < kth
+            tied = rows == kth
+            num_tied = num_neighbours - closer.sum(axis=1, keepdims=True)
+            selected = closer | (tied & (np.cumsum(tied, axis=1) <= num_tied))
+            candidates = np.nonzero(selected)[1].reshape(stop - start, num_neighbours)
+            candidate_closeness = np.take_along_axis(rows, candidates, axis=1)
+            order = np.lexsort((candidates, candidate_closeness))
+            self.neighbour_array[start:stop] = np.take_along_axis(candidates, order, axis=1)
+
+    def get_subproblem(self, node_indexes, vehicle_indexes):
+        """
+        problem over the depots and a subset of the jobs and vehicles, e.g. one cluster of a decomposition, nodes and
+        vehicles are renumbered in the order of node_indexes and vehicle_indexes and the depots have to come first
+        with their own indexes so that node references in the attributes stay valid
+        """
+        node_indexes = list(node_indexes)
+        vehicle_indexes = list(vehicle_indexes)
+        num_depots = len(self.depot_index_list)
+        if node_indexes[:num_depots] != list(range(num_depots)):
+            logging.error(f"{self.__class__.__name__}::the depots have to be the first nodes of a subproblem")
+            exit(1)
+
+        global_attrs = {attr.name: self.global_attrs_tensor[attr.index] for attr in self.model.global_attrs}
+        vehicle_node_node_attrs = {attr.name: self.vehicle_node_node_attr_matrices[attr.index].get_subset(node_indexes, vehicle_indexes)
+                                   for attr in self.model.vehicle_node_node_attrs}
+        if self.storage == "array":
+            nodes = np.asarray(node_indexes)
+            vehicles = np.asarray(vehicle_indexes, dtype=np.int64)
+            vehicle_attrs = {attr.name: self.vehicle_attr_arrays[attr.index][vehicles] for attr in self.model.vehicle_attrs}
+            node_attrs = {attr.name: self.node_attr_arrays[attr.index][nodes] for attr in self.model.node_attrs}
+            node_node_attrs = {}
+            for attr in self.model.node_node_attrs:
+                array = self.node_node_attr_arrays[attr.index]
+                node_node_attrs[attr.name] = array.get_subset(nodes) if isinstance(array, LazyMatrix) else array[np.ix_(nodes, nodes)]
+            problem = Problem.from_arrays(self.model, list(range(num_depots)), global_attrs, vehicle_attrs, node_attrs, node_node_attrs,
+                                          vehicle_node_node_attrs, len(vehicle_indexes), len(node_indexes))
+        else:
+            problem = Problem.__new__(Problem)
+            problem.setup(self.model, list(range(num_depots)), global_attrs, len(vehicle_indexes), len(node_indexes), "list")
+            problem.vehicle_attrs_tensor = [self.vehicle_attrs_tensor[vehicle_idx] for vehicle_idx in vehicle_indexes]
+            problem.node_attrs_tensor = [self.node_attrs_tensor[node_idx] for node_idx in node_indexes]
+            problem.node_node_attrs_tensor = [[self.node_node_attrs_tensor[x][y] for y in node_indexes] for x in node_indexes]
+            problem.set_vehicle_matrices(vehicle_node_node_attrs)
+
+        problem.set_closeness(self.closeness)
+        if self.spatial_attrs is not None:
+            problem.set_spatial_index(*self.spatial_attrs)
+        return problem
+
+    # dynamic changes of a live problem, the cost of each change is proportional to one row and column of the matrices
+    def add_node(self, node_attrs, node_node_attrs=None, vehicle_node_node_attrs=None, is_depot=False):
+        """
+        appends a node and returns its index, node_attrs holds the value of every node attribute, node_node_attrs the
+        (row, column) of every node-node attribute with the values from and to all nodes including the new one and
+        vehicle_node_node_attrs one (row, column) per vehicle profile, a lazy matrix takes the value for its add_node
+        instead, e.g. the (x, y) coordinates of a EuclideanMatrix
+        """
+        node_node_attrs = node_node_attrs or {}
+        vehicle_node_node_attrs = vehicle_node_node_attrs or {}
+        node_idx = self.num_nodes
+        if self.storage == "array":
+            for attr in self.model.node_attrs:
+                self.node_attr_arrays[attr.index] = np.append(self.node_attr_arrays[attr.index], node_attrs[attr.name])
+            for attr in self.model.node_node_attrs:
+                array = self.node_node_attr_arrays[attr.index]
+                if isinstance(array, LazyMatrix):
+                    array.add_node(node_node_attrs.get(attr.name))
+                else:
+                    self.append_node_node_array(attr.index, *node_node_attrs[attr.name])
+        else:
+            self.node_attrs_tensor.append([node_attrs[attr.name] for attr in self.model.node_attrs])
+            values = [node_node_attrs[attr.name] for attr in self.model.node_node_attrs]
+            for x, row in enumerate(self.node_node_attrs_tensor):
+                row.append([column[x] for _, column in values])
+            self.node_node_attrs_tensor.append([[row[y] for row, _ in values] for y in range(node_idx + 1)])
+        for attr in self.model.vehicle_node_node_attrs:
+            self.vehicle_node_node_attr_matrices[attr.index].add_node(vehicle_node_node_attrs[attr.name])
+
+        self.num_nodes += 1
+        if is_depot:
+            self.depot_index_list.append(node_idx)
+        else:
+            self.job_indexes.append(node_idx)
+        self.update_compiled_node(node_idx)
+
+        if self.spatial_attrs is not None:
+            self.set_spatial_index(*self.spatial_attrs)
+        if self.neighbour_array is not None:
+            self.add_neighbours(node_idx)
+
+        return node_idx
+
+    def remove_node(self, node_idx):
+        """
+        deactivates a node, it is no longer a job and is dropped from the neighbour lists of the other nodes while its
+        attributes stay in place
+        """
+        if node_idx in self.inactive_nodes:
+            return
+
+        self.inactive_nodes.add(node_idx)
+        if node_idx in self.job_indexes:
+            self.job_indexes.remove(node_idx)
+        if self.neighbour_array is not None:
+            self.remove_neighbours(node_idx)
+
+    def add_vehicle(self, vehicle_attrs, vehicle_profiles=None):
+        """
+        appends a vehicle and returns its index, vehicle_profiles holds the profile of the vehicle for every
+        vehicle-node-node attribute
+        """
+        vehicle_idx = self.num_vehicles
+        if self.storage == "array":
+            for attr in self.model.vehicle_attrs:
+                self.vehicle_attr_arrays[attr.index] = np.append(self.vehicle_attr_arrays[attr.index], vehicle_attrs[attr.name])
+        else:
+            self.vehicle_attrs_tensor.append([vehicle_attrs[attr.name] for attr in self.model.vehicle_attrs])
+        for attr in self.model.vehicle_node_node_attrs:
+            self.vehicle_node_node_attr_matrices[attr.index].vehicle_profiles.append(vehicle_profiles[attr.name])
+
+        self.num_vehicles += 1
+        self.vehicle_indexes.append(vehicle_idx)
+        if self.compiled is not None:
+            for attr in self.model.vehicle_attrs:
+                getattr(self.compiled, attr.name).append(vehicle_attrs[attr.name])
+            for attr in self.model.vehicle_node_node_attrs:
+                getattr(self.compiled, attr.name).append(self.get_compiled_matrix(attr, vehicle_idx))
+
+        return vehicle_idx
+
+    def get_compiled_matrix(self, attr, vehicle_idx):
+        # the compiled matrix of a new vehicle shares the rows of a compiled vehicle with the same profile
+        matrices = self.vehicle_node_node_attr_matrices[attr.index]
+        if not matrices.is_array:
+            return matrices.get_matrix(vehicle_idx)
+
+        if not matrices.overrides.get(vehicle_idx):
+            accessor = getattr(self.compiled, attr.name)
+            for other, matrix in enumerate(accessor):
+                if matrices.vehicle_profiles[other] == matrices.vehicle_profiles[vehicle_idx] and not matrices.overrides.get(other):
+                    return matrix
+        return get_row_views(matrices.get_matrix(vehicle_idx))
+
+    def remove_vehicle(self, vehicle_idx):
+        # deactivates a vehicle, solvers only use the vehicles in vehicle_indexes
+        if vehicle_idx in self.vehicle_indexes:
+            self.vehicle_indexes.remove(vehicle_idx)
+
+    def append_node_node_array(self, index, row, column):
+        # the capacity of the buffer doubles so that adding a node copies the whole matrix only once in a while
+        array = self.node_node_attr_arrays[index]
+        num_nodes = array.shape[0]
+        row, column = np.asarray(row), np.asarray(column)
+        buffer = self.node_node_attr_buffers[index]
+        if buffer is None or buffer.shape[0] <= num_nodes:
+            capacity = max(2 * num_nodes, num_nodes + 1)
+            buffer = np.empty((capacity, capacity), dtype=np.result_type(array, row, column))
+            buffer[:num_nodes, :num_nodes] = array
+            self.node_node_attr_buffers[index] = buffer
+
+        buffer[:num_nodes + 1, num_nodes] = column
+        buffer[num_nodes, :num_nodes + 1] = row
+        self.node_node_attr_arrays[index] = buffer[:num_nodes + 1, :num_nodes + 1]
+
+    def update_compiled_node(self, node_idx):
+        # extends the compiled accessors by the new node instead of compiling the problem again
+        compiled = self.compiled
+        if compiled is None:
+            return
+
+        for attr in self.model.node_attrs:
+            getattr(compiled, attr.name).append(self.get_node_attr(node_idx, attr))
+        for attr in self.model.node_node_attrs:
+            accessor = getattr(compiled, attr.name)
+            if self.storage != "array":
+                for x, row in enumerate(accessor):
+                    row.append(self.get_node_node_attr(x, node_idx, attr))
+                accessor.append([self.get_node_node_attr(node_idx, y, attr) for y in range(self.num_nodes)])
+            elif isinstance(accessor, RowViews):
+                # rows of a lazy matrix view are evaluated again with the new column
+                accessor.rows.clear()
+            else:
+                # the rows of the grown array are new views, the matrix itself is not copied
+                setattr(compiled, attr.name, get_row_views(self.node_node_attr_arrays[attr.index]))
+        for attr in self.model.vehicle_node_node_attrs:
+            matrices = self.vehicle_node_node_attr_matrices[attr.index]
+            if matrices.is_array:
+                setattr(compiled, attr.name, self.compile_vehicle_matrices(attr))
+                continue
+
+            # vehicles share the lists of their profile, which were extended above, and only copied rows of vehicles
+            # with overrides are extended here, each once
+            extended = set()
+            for profile in matrices.profiles:
+                extended.add(id(profile))
+                extended.update(id(row) for row in profile)
+            for vehicle_idx, matrix in enumerate(getattr(compiled, attr.name)):
+                profile = matrices.profiles[matrices.vehicle_profiles[vehicle_idx]]
+                for x, row in enumerate(matrix):
+                    if id(row) not in extended:
+                        extended.add(id(row))
+                        row.append(profile[x][node_idx])
+                if id(matrix) not in extended:
+                    extended.add(id(matrix))
+                    matrix.append(profile[node_idx])
+
+    def get_closeness(self, node_idx1, node_idx2):
+        if self.closeness is None:
+            index = self.spatial_index
+            return float(np.hypot(index.xs[node_idx2] - index.xs[node_idx1], index.ys[node_idx2] - index.ys[node_idx1]))
+        if isinstance(self.closeness, NodeNodeAttr):
+            return self.get_node_node_attr(node_idx1, node_idx2, self.closeness)
+        return self.closeness(self, node_idx1, node_idx2)
+
+    def get_neighbourhood_size(self):
+        if isinstance(self.neighbour_array, list):
+            return max((len(neighbours) for neighbours in self.neighbour_array), default=0)
+        return self.neighbour_array.shape[1]
+
+    def get_neighbour_row(self, node_idx, num_neighbours):
+        # closest active nodes of node_idx, ties broken by index as in update_neighbour
+        candidates = (other for other in range(self.num_nodes) if other != node_idx and other not in self.inactive_nodes)
+        return heapq.nsmallest(num_neighbours, candidates, key=lambda other: (self.get_closeness(node_idx, other), other))
+
+    def set_neighbour_rows(self, rows):
+        # replaces the neighbour lists of the nodes in rows, appending the lists of new nodes
+        num_neighbours = self.get_neighbourhood_size()
+        if isinstance(self.neighbour_array, list):
+            for node_idx, neighbours in rows.items():
+                if node_idx < len(self.neighbour_array):
+                    self.neighbour_array[node_idx] = neighbours
+                else:
+                    self.neighbour_array.append(neighbours)
+            return
+
+        if any(len(neighbours) != num_neighbours for neighbours in rows.values()):
+            # lists of equal length do not fit anymore, e.g. fewer active nodes than neighbours
+            self.update_neighbour(num_neighbours)
+            return
+
+        num_rows = max(max(rows) + 1, len(self.neighbour_array))
+        if num_rows > len(self.neighbour_array) or not self.neighbour_array.flags.writeable:
+            neighbour_array = np.empty((num_rows, num_neighbours), dtype=np.int32)
+            neighbour_array[:len(self.neighbour_array)] = self.neighbour_array
+            self.neighbour_array = neighbour_array
+        for node_idx, neighbours in rows.items():
+            self.neighbour_array[node_idx] = neighbours
+
+    def add_neighbours(self, node_idx):
+        # the new node gets its own list and enters the lists of the nodes it is closer to than their last neighbour
+        num_neighbours = self.get_neighbourhood_size()
+        rows = {node_idx: self.get_neighbour_row(node_idx, num_neighbours)}
+        for other in range(node_idx):
+            if other in self.inactive_nodes:
+                continue
+
+            neighbours = self.get_neighbours(other)
+            closeness = self.get_closeness(other, node_idx)
+            if len(neighbours) >= num_neighbours and closeness >= self.get_closeness(other, neighbours[-1]):
+                continue
+
+            position = bisect.bisect_right([self.get_closeness(other, neighbour) for neighbour in neighbours], closeness)
+            neighbours.insert(position, node_idx)
+            rows[other] = neighbours[:num_neighbours]
+        self.set_neighbour_rows(rows)
+
+    def remove_neighbours(self, node_idx):
+        # the lists that contained the removed node are filled up with their next closest node
+        num_neighbours = self.get_neighbourhood_size()
+        if isinstance(self.neighbour_array, list):
+            nodes = [other for other, neighbours in enumerate(self.neighbour_array) if node_idx in neighbours]
+        else:
+            nodes = np.nonzero((self.neighbour_array == node_idx).any(axis=1))[0].tolist()
+        self.set_neighbour_rows({other: self.get_neighbour_row(other, num_neighbours) for other in nodes if other not in self.inactive_nodes})
@@ -0,0 +1,65 @@
+import json
+import time
+
+
+class Profiler:
+    """
+    counters and timers of a solve, attached to a problem with problem.set_profiler, solvers and solutions only record
+    into it when one is attached so that it costs nothing otherwise
+    """
+    def __init__(self):
+        self.counts = {}
+        self.timers = {}
+        self.moves = {}
+        self.pending_moves = []
+
+    def reset(self):
+        self.counts = {}
+        self.timers = {}
+        self.moves = {}
+        self.pending_moves = []
+
+    def count(self, name, value=1):
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    def add_time(self, name, seconds):
+        timer = self.timers.get(name)
+        if timer is None:
+            self.timers[name] = [1, seconds]
+        else:
+            timer[0] += 1
+            timer[1] += seconds
+
+    def call(self, name, function, *args):
+        # calls function with args and adds its duration to the timer of name
+        start_time = time.perf_counter()
+        output = function(*args)
+        self.add_time(name, time.perf_counter() - start_time)
+        return output
+
+    def record_move(self, name):
+        # a move stays pending until the solution is committed or rolled back
+        self.pending_moves.append(name)
+
+    def resolve_moves(self, accepted):
+        for name in self.pending_moves:
+            move = self.moves.get(name)
+            if move is None:
+                move = self.moves[name] = [0, 0]
+            move[0 if accepted else 1] += 1
+        self.pending_moves = []
+
+    def get_stats(self):
+        moves = {}
+        for name, (accepted, rejected) in sorted(self.moves.items()):
+            total = accepted + rejected
+            moves[name] = {"applied": total, "accepted": accepted, "rejected": rejected,
+                           "accept_ratio": accepted / total if total > 0 else 0.0}
+        timers = {name: {"calls": calls, "seconds": seconds, "mean_seconds": seconds / calls}
+                  for name, (calls, seconds) in sorted(self.timers.items())}
+
+        return {"moves": moves, "counts": dict(sorted(self.counts.items())), "timers": timers}
+
+    def export(self, file_path):
+        with open(file_path, "w") as f:
+            json.dump(self.get_stats(), f, indent=2)
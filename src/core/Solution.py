@@ -1,48 +1,240 @@
+from src.core.Pareto import compare
+from array import array
 import logging
+import time
+
+FINGERPRINT_MASK = (1 << 64) - 1
+
+
+def get_mixed_hash(value):
+    # splitmix64 finaliser, the hash of a tuple of small ints is close to linear and would let arc sums cancel out
+    value = (value + 0x9E3779B97F4A7C15) & FINGERPRINT_MASK
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & FINGERPRINT_MASK
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & FINGERPRINT_MASK
+    return value ^ (value >> 31)
+
+
+def calc_route_fingerprint(problem, route):
+    # sum of the hashes of the arcs of the route including the depot, -1, at both ends, an empty route counts 0
+    fingerprint = 0
+    pred = -1
+    for job in route.jobs:
+        fingerprint += get_mixed_hash(((pred + 1) << 32) | (job + 1))
+        pred = job
+    if pred >= 0:
+        fingerprint += get_mixed_hash((pred + 1) << 32)
+    return fingerprint & FINGERPRINT_MASK
 
 
 class Route:
-    def __init__(self, vehicle_idx=-1, jobs=[]):
+    __slots__ = ("vehicle_idx", "jobs", "is_feasible", "profiles")
+
+    def __init__(self, vehicle_idx=-1, jobs=None):
         self.vehicle_idx = vehicle_idx
-        self.jobs = jobs
+        self.jobs = array("i", jobs if jobs is not None else [])
+        self.is_feasible = None
+        self.profiles = {}
 
     def copy(self):
-        return Route(self.vehicle_idx, [job for job in self.jobs])
+        route = Route(self.vehicle_idx)
+        route.jobs = self.jobs[:]
+        route.is_feasible = self.is_feasible
+        route.profiles = dict(self.profiles)
+        return route
 
     def clear_jobs(self):
-        self.jobs = []
+        self.jobs = array("i")
+        self.is_feasible = None
+        self.profiles = {}
 
     def __repr__(self):
-        return f"vehicle_idx: {self.vehicle_idx}, jobs: {self.jobs}"
+        return f"vehicle_idx: {self.vehicle_idx}, jobs: {self.jobs.tolist()}"
 
 
 class Solution:
     def __init__(self, problem):
         self.problem = problem
         self.routes = []
-        self.unassigned_jobs = []
+        self.unassigned_jobs = set()
+        self.job_locations = {}
+        self.vehicle_routes = {}
         self.objectives_output = []
         self.is_feasible = True
         self.cache = None
+        self.journal = None
+        self.snapshot = None
 
-    def create_cache(self):
-        self.cache = self.copy()
+    def create_cache(self, transactional=False):
+        # a transactional cache is the solution itself, accepting and resetting it commits and rolls back its journal
+        if transactional:
+            self.cache = self
+            self.begin()
+        else:
+            self.cache = self.copy()
         return self.cache
 
     def reset_cache(self):
-        self.cache.assigned_by(self)
+        start_time = time.perf_counter() if self.problem.profiler is not None else None
+        if self.cache is self:
+            self.rollback()
+        else:
+            self.cache.assigned_by(self)
+            if start_time is not None:
+                self.problem.profiler.resolve_moves(False)
+
+        if start_time is not None:
+            self.problem.profiler.add_time("reset_cache", time.perf_counter() - start_time)
 
     def accept_cache(self):
-        if self.cache:
+        start_time = time.perf_counter() if self.problem.profiler is not None else None
+        if self.cache is self:
+            self.commit()
+        elif self.cache:
             self.assigned_by(self.cache)
+            if start_time is not None:
+                self.problem.profiler.resolve_moves(True)
         else:
             logging.warning(f"{self.__class__.__name__}::cache is not defined, creating a copy of solution as cache")
             self.create_cache()
 
+        if start_time is not None:
+            self.problem.profiler.add_time("accept_cache", time.perf_counter() - start_time)
+
+    def begin(self):
+        # start recording the inverse of every change so that it can be rolled back in proportion to its size
+        self.journal = []
+        self.snapshot = (self.is_feasible, self.objectives_output)
+
+    def commit(self):
+        if self.problem.profiler is not None:
+            self.problem.profiler.resolve_moves(True)
+        self.begin()
+
+    def end(self):
+        # stop recording changes, the current state is kept
+        self.journal = None
+        self.snapshot = None
+
+    def rollback(self):
+        if self.journal is None:
+            logging.warning(f"{self.__class__.__name__}::no transaction to roll back")
+            return
+
+        journal, self.journal = self.journal, None
+        for function, args in reversed(journal):
+            function(*args)
+        self.is_feasible, self.objectives_output = self.snapshot
+        if self.problem.profiler is not None:
+            self.problem.profiler.resolve_moves(False)
+        self.begin()
+
+    def record(self, function, *args):
+        if self.journal is not None:
+            self.journal.append((function, args))
+
+    def add_route(self, route):
+        self.routes.append(route)
+        self.vehicle_routes.setdefault(route.vehicle_idx, route)
+        self.index_route(route)
+        self.record(self.remove_route, route)
+
+    def remove_route(self, route):
+        index = self.routes.index(route)
+        self.routes.pop(index)
+        for job in route.jobs:
+            del self.job_locations[job]
+        if self.vehicle_routes.get(route.vehicle_idx) is route:
+            del self.vehicle_routes[route.vehicle_idx]
+        self.record(self.insert_route, index, route)
+
+    def insert_route(self, index, route):
+        self.routes.insert(index, route)
+        self.vehicle_routes.setdefault(route.vehicle_idx, route)
+        self.index_route(route)
+        self.record(self.remove_route, route)
+
+    def insert_job(self, route, index, job):
+        self.touch_route(route)
+        route.jobs.insert(index, job)
+        self.index_route(route, index)
+        self.record(self.remove_job, route, index)
+
+    def remove_job(self, route, index):
+        self.touch_route(route)
+        job = route.jobs.pop(index)
+        del self.job_locations[job]
+        self.index_route(route, index)
+        self.record(self.insert_job, route, index, job)
+        return job
+
+    def replace_job(self, route, index, job):
+        self.touch_route(route)
+        old_job = route.jobs[index]
+        route.jobs[index] = job
+        if self.job_locations.get(old_job) == (route, index):
+            del self.job_locations[old_job]
+        self.job_locations[job] = (route, index)
+        self.record(self.replace_job, route, index, old_job)
+        return old_job
+
+    def insert_segment(self, route, index, jobs):
+        self.touch_route(route)
+        route.jobs[index:index] = array("i", jobs)
+        self.index_route(route, index)
+        self.record(self.remove_segment, route, index, index + len(jobs))
+
+    def remove_segment(self, route, start, stop):
+        self.touch_route(route)
+        jobs = route.jobs[start:stop].tolist()
+        del route.jobs[start:stop]
+        for job in jobs:
+            del self.job_locations[job]
+        self.index_route(route, start)
+        self.record(self.insert_segment, route, start, jobs)
+        return jobs
+
+    def add_unassigned_job(self, job):
+        self.unassigned_jobs.add(job)
+        self.record(self.remove_unassigned_job, job)
+
+    def remove_unassigned_job(self, job):
+        self.unassigned_jobs.remove(job)
+        self.record(self.add_unassigned_job, job)
+
+    def index_route(self, route, start=0):
+        # update the locations of the jobs from start to the end of the route
+        for index in range(start, len(route.jobs)):
+            self.job_locations[route.jobs[index]] = (route, index)
+
+    def reindex(self):
+        self.job_locations = {}
+        self.vehicle_routes = {}
+        for route in self.routes:
+            self.vehicle_routes.setdefault(route.vehicle_idx, route)
+            self.index_route(route)
+
+    def get_fingerprint(self):
+        """
+        order-independent hash of the routes of the solution and their vehicles, equal solutions have equal
+        fingerprints and different ones collide with a probability of about 2^-64, empty routes do not count,
+        the fingerprint of a route is cached with its profiles so only the routes changed since the last call are hashed
+        """
+        fingerprint = 0
+        for route in self.routes:
+            route_fingerprint = self.get_route_profile(route, calc_route_fingerprint)
+            if route_fingerprint:
+                fingerprint += get_mixed_hash(route_fingerprint ^ ((route.vehicle_idx + 1) << 40))
+        return fingerprint & FINGERPRINT_MASK
+
+    def locate_job(self, job):
+        # returns the route and position of the job, or (None, -1) if it is not in any route
+        return self.job_locations.get(job, (None, -1))
+
     def copy(self):
         solution = Solution(self.problem)
         solution.routes = [route.copy() for route in self.routes]
-        solution.unassigned_jobs = [job for job in self.unassigned_jobs]
+        solution.unassigned_jobs = set(self.unassigned_jobs)
+        solution.reindex()
         solution.objectives_output = [output for output in self.objectives_output]
         solution.is_feasible = self.is_feasible
 
@@ -50,31 +242,108 @@ class Solution:
 
     def assigned_by(self, other):
         self.routes = [route.copy() for route in other.routes]
-        self.unassigned_jobs = [job for job in other.unassigned_jobs]
+        self.unassigned_jobs = set(other.unassigned_jobs)
+        self.reindex()
         self.objectives_output = [output for output in other.objectives_output]
         self.is_feasible = other.is_feasible
 
     def get_route(self, vehicle_idx):
-        for route in self.routes:
-            if route.vehicle_idx == vehicle_idx:
-                return route
+        return self.vehicle_routes.get(vehicle_idx)
+
+    def touch_route(self, route):
+        # invalidate the cached route-level results, the route will be re-evaluated on the next check
+        self.record(self.restore_route, route, route.is_feasible, route.profiles)
+        route.is_feasible = None
+        route.profiles = {}
+
+    def restore_route(self, route, is_feasible, profiles):
+        route.is_feasible = is_feasible
+        route.profiles = profiles
+
+    def get_route_profile(self, route, profile_function):
+        if profile_function not in route.profiles:
+            profiler = self.problem.profiler
+            if profiler is None:
+                route.profiles[profile_function] = profile_function(self.problem, route)
+            else:
+                route.profiles[profile_function] = profiler.call("profile." + profile_function.__name__, profile_function, self.problem, route)
+
+        return route.profiles[profile_function]
+
+    def check_insertion(self, route, index, job):
+        """
+        checks whether job can be inserted at index of a feasible route without mutating the solution,
+        returns None if any constraint cannot decide it
+        """
+        if not self.eval_route_constraint(route):
+            return None
+
+        profiler = self.problem.profiler
+        for constraint in self.problem.model.constraints:
+            insertion_function = getattr(constraint, "insertion_function", None)
+            if insertion_function is None:
+                return None
+
+            profile = self.get_route_profile(route, constraint.profile_function) if constraint.profile_function else None
+            if profiler is None:
+                feasible = insertion_function(self.problem, route, profile, index, job)
+            else:
+                feasible = profiler.call("insertion." + constraint.name, insertion_function, self.problem, route, profile, index, job)
+            if not feasible:
+                return False
+
+        return True
 
     def set_unassigned_jobs(self, unassigned_jobs):
-        self.unassigned_jobs = unassigned_jobs
+        self.unassigned_jobs = set(unassigned_jobs)
 
     def eval_unassigned_jobs(self):
-        assigned_jobs = [job for route in self.routes for job in route.jobs]
-        unassigned_jobs = [job for job in self.problem.job_indexes if job not in assigned_jobs]
+        # rebuild the job locations in case routes were changed without the mutation primitives
+        self.reindex()
+        unassigned_jobs = [job for job in self.problem.job_indexes if job not in self.job_locations]
         self.set_unassigned_jobs(unassigned_jobs)
 
         return len(self.unassigned_jobs)
 
+    def eval_route_constraint(self, route):
+        if route.is_feasible is None:
+            profiler = self.problem.profiler
+            route.is_feasible = True
+            for constraint in self.problem.model.constraints:
+                route_function = getattr(constraint, "route_function", None)
+                if route_function is None:
+                    continue
+
+                if profiler is None:
+                    feasible = route_function(self.problem, route)
+                else:
+                    feasible = profiler.call("route_constraint." + constraint.name, route_function, self.problem, route)
+                if not feasible:
+                    route.is_feasible = False
+                    break
+
+        return route.is_feasible
+
+    def eval_routes_constraint(self, routes):
+        for route in routes:
+            if not self.eval_route_constraint(route):
+                return False
+
+        return True
+
     def eval_constraint(self):
-        self.is_feasible = True
-        for constraint in self.problem.model.constraints:
-            if not constraint(self):
-                self.is_feasible = False
-                break
+        # route-level constraints are only re-evaluated for routes touched since their last check
+        self.is_feasible = self.eval_routes_constraint(self.routes)
+        if self.is_feasible:
+            profiler = self.problem.profiler
+            for constraint in self.problem.model.constraints:
+                if getattr(constraint, "route_function", None) is not None:
+                    continue
+
+                feasible = constraint(self) if profiler is None else profiler.call("constraint." + getattr(constraint, "name", constraint.__name__), constraint, self)
+                if not feasible:
+                    self.is_feasible = False
+                    break
 
         return self.is_feasible
 
@@ -83,16 +352,26 @@ class Solution:
 
         return self.objectives_output
 
+    def insertion_delta(self, route, index, job):
+        # objective deltas of inserting an unassigned job at index of route, None for objectives without a delta
+        return [objective.insertion_delta(self, route, index, job) if objective.insertion_delta else None
+                for objective in self.problem.model.objectives]
+
+    def removal_delta(self, route, index):
+        # objective deltas of removing the job at index of route, None for objectives without a delta
+        return [objective.removal_delta(self, route, index) if objective.removal_delta else None
+                for objective in self.problem.model.objectives]
+
     def eval_solution(self, allow_infeasible=False):
         self.eval_unassigned_jobs()
         if self.eval_constraint() or allow_infeasible:
             self.eval_objective()
 
     def equals(self, other):
-        self_routes = [route.jobs for route in self.routes]
-        other_routes = [route.jobs for route in other.routes]
-        for route in self_routes:
-            if route not in other_routes:
+        # every route of the solution is a route of the other one, compared by their jobs in one pass over both
+        other_routes = {route.jobs.tobytes() for route in other.routes}
+        for route in self.routes:
+            if route.jobs.tobytes() not in other_routes:
                 return False
 
         return True
@@ -104,19 +383,19 @@ class Solution:
 
         return True
 
-    def __lt__(self, other):
-        for i in range(len(self.objectives_output)):
-            if self.objectives_output[i] < other.objectives_output[i]:
-                return True
+    def compare(self, other, mode="lexicographic", tolerance=0.0):
+        # -1 if the solution is better than the other one, 1 if it is worse and 0 if neither, see Pareto.compare
+        return compare(self.objectives_output, other.objectives_output, mode, tolerance)
 
-        return False
+    def dominates(self, other):
+        return self.compare(other, "pareto") == -1
 
-    def __gt__(self, other):
-        for i in range(len(self.objectives_output)):
-            if self.objectives_output[i] > other.objectives_output[i]:
-                return True
+    def __lt__(self, other):
+        # objectives are ordered by priority, the first one that differs decides
+        return self.compare(other) == -1
 
-        return False
+    def __gt__(self, other):
+        return self.compare(other) == 1
 
     def __repr__(self):
         names = [objective.name for objective in self.problem.model.objectives]
@@ -0,0 +1,70 @@
+from collections import OrderedDict
+
+
+class SolutionCache:
+    """
+    bounded memo of evaluated solutions keyed by their fingerprint, holds the objectives and the feasibility of the
+    most recently seen solutions so that a search can skip evaluating a solution again, the least recently used entry
+    is evicted once max_size entries are stored
+    """
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, fingerprint):
+        # (objectives, is_feasible) of a seen solution, None if it is not in the cache
+        entry = self.entries.get(fingerprint)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(fingerprint)
+        self.hits += 1
+        return entry
+
+    def put(self, fingerprint, objectives, is_feasible):
+        self.entries[fingerprint] = (list(objectives), is_feasible)
+        self.entries.move_to_end(fingerprint)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def eval_solution(self, solution, allow_infeasible=False):
+        """
+        evaluates the solution unless it was seen before, in which case its objectives and feasibility are taken from
+        the cache, returns True on a hit, the unassigned jobs have to be kept up to date by the mutation primitives
+        """
+        fingerprint = solution.get_fingerprint()
+        entry = self.get(fingerprint)
+        if entry is not None:
+            objectives, solution.is_feasible = entry
+            solution.objectives_output = list(objectives)
+            return True
+
+        solution.eval_solution(allow_infeasible)
+        # the objectives of an infeasible solution are only evaluated when allowed
+        if solution.is_feasible or allow_infeasible:
+            self.put(fingerprint, solution.objectives_output, solution.is_feasible)
+        return False
+
+    def __contains__(self, fingerprint):
+        # membership test for tabu lists, does not count as a lookup
+        return fingerprint in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        self.entries.clear()
+
+    def get_stats(self):
+        lookups = self.hits + self.misses
+        return {"size": len(self.entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups > 0 else 0.0}
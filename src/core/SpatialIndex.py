@@ -0,0 +1,106 @@
+import math
+import numpy as np
+
+
+class SpatialIndex:
+    """
+    uniform grid over the coordinates of the nodes, supports k-nearest and radius queries without a distance matrix
+    """
+    def __init__(self, xs, ys, points_per_cell=2):
+        self.xs = np.asarray(xs, dtype=float)
+        self.ys = np.asarray(ys, dtype=float)
+        self.num_points = len(self.xs)
+
+        self.min_x = self.xs.min()
+        self.min_y = self.ys.min()
+        width = max(self.xs.max() - self.min_x, 1e-9)
+        height = max(self.ys.max() - self.min_y, 1e-9)
+        # cells are sized from the area and from the larger extent, so that points on a line do not spread over
+        # millions of empty cells, the grid has at most about num_points / points_per_cell cells per row and column
+        self.cell_size = max(math.sqrt(width * height * points_per_cell / self.num_points),
+                             max(width, height) * points_per_cell / self.num_points, 1e-9)
+        self.num_cols = int(width / self.cell_size) + 1
+        self.num_rows = int(height / self.cell_size) + 1
+
+        # points sorted by cell, the points of cell c are order[cell_start[c]:cell_start[c + 1]]
+        cells = self.get_cells(self.xs, self.ys)
+        self.order = np.argsort(cells, kind="stable").astype(np.int32)
+        self.cell_start = np.searchsorted(cells[self.order], np.arange(self.num_cols * self.num_rows + 1))
+
+    def get_cells(self, xs, ys):
+        cols = np.clip(((xs - self.min_x) / self.cell_size).astype(int), 0, self.num_cols - 1)
+        rows = np.clip(((ys - self.min_y) / self.cell_size).astype(int), 0, self.num_rows - 1)
+        return rows * self.num_cols + cols
+
+    def get_points(self, col_range, row_range):
+        col_from, col_to = max(col_range[0], 0), min(col_range[1], self.num_cols - 1)
+        row_from, row_to = max(row_range[0], 0), min(row_range[1], self.num_rows - 1)
+        if col_from > col_to or row_from > row_to:
+            return np.empty(0, dtype=np.int32)
+
+        # the cells of one grid row are contiguous in the sorted order
+        slices = [self.order[self.cell_start[row * self.num_cols + col_from]:self.cell_start[row * self.num_cols + col_to + 1]]
+                  for row in range(row_from, row_to + 1)]
+        return np.concatenate(slices)
+
+    def get_ring(self, col, row, ring):
+        # points in the cells at chebyshev distance ring from (col, row)
+        if ring == 0:
+            return self.get_points((col, col), (row, row))
+
+        slices = [self.get_points((col - ring, col + ring), (row - ring, row - ring)),
+                  self.get_points((col - ring, col + ring), (row + ring, row + ring)),
+                  self.get_points((col - ring, col - ring), (row - ring + 1, row + ring - 1)),
+                  self.get_points((col + ring, col + ring), (row - ring + 1, row + ring - 1))]
+        return np.concatenate(slices)
+
+    def query_radius(self, x, y, radius):
+        """
+        returns the indexes of the points within radius of (x, y) sorted by distance
+        """
+        col_from, row_from = self.get_col_row(x - radius, y - radius)
+        col_to, row_to = self.get_col_row(x + radius, y + radius)
+        candidates = self.get_points((col_from, col_to), (row_from, row_to))
+        distances = np.hypot(self.xs[candidates] - x, self.ys[candidates] - y)
+        within = distances <= radius
+        candidates, distances = candidates[within], distances[within]
+        return candidates[np.lexsort((candidates, distances))]
+
+    def query_knn(self, x, y, k, exclude=None):
+        """
+        returns the indexes of the k points closest to (x, y) sorted by distance, ties broken by index
+        """
+        num_available = self.num_points - (1 if exclude is not None else 0)
+        k = min(k, num_available)
+        if k <= 0:
+            return np.empty(0, dtype=np.int32)
+
+        col, row = self.get_col_row(x, y)
+        max_ring = max(self.num_cols, self.num_rows)
+        found = []
+        num_found = 0
+        ring = 0
+        while ring <= max_ring:
+            points = self.get_ring(col, row, ring)
+            if exclude is not None:
+                points = points[points != exclude]
+            found.append(points)
+            num_found += len(points)
+
+            # every point closer than ring * cell_size has been visited once num_found reaches k
+            if num_found >= k:
+                candidates = np.concatenate(found)
+                distances = np.hypot(self.xs[candidates] - x, self.ys[candidates] - y)
+                if np.partition(distances, k - 1)[k - 1] < ring * self.cell_size or num_found == num_available:
+                    order = np.lexsort((candidates, distances))[:k]
+                    return candidates[order]
+            ring += 1
+
+        candidates = np.concatenate(found)
+        distances = np.hypot(self.xs[candidates] - x, self.ys[candidates] - y)
+        return candidates[np.lexsort((candidates, distances))[:k]]
+
+    def get_col_row(self, x, y):
+        col = int(math.floor((x - self.min_x) / self.cell_size))
+        row = int(math.floor((y - self.min_y) / self.cell_size))
+        return col, row
@@ -0,0 +1,124 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class VehicleMatrices:
+    """
+    vehicle-node-node attribute stored once per vehicle profile, vehicle_profiles maps each vehicle to the index of its
+    profile matrix and overrides holds sparse per-vehicle entries as {vehicle_idx: {(node_idx1, node_idx2): value}}
+    """
+    def __init__(self, profiles, vehicle_profiles, overrides=None):
+        self.profiles = list(profiles)
+        self.vehicle_profiles = list(vehicle_profiles)
+        self.overrides = {}
+        self.is_array = len(self.profiles) > 0 and hasattr(self.profiles[0], "item")
+        for vehicle_idx, entries in (overrides or {}).items():
+            for (node_idx1, node_idx2), value in entries.items():
+                self.set_override(vehicle_idx, node_idx1, node_idx2, value)
+
+    @classmethod
+    def from_dense(cls, matrices):
+        """
+        builds the profiles from one matrix per vehicle, vehicles with identical matrices share a profile
+        """
+        profiles = []
+        vehicle_profiles = []
+        profile_indexes = {}
+        for matrix in matrices:
+            key = matrix.tobytes() if hasattr(matrix, "tobytes") else tuple(tuple(row) for row in matrix)
+            if key not in profile_indexes:
+                profile_indexes[key] = len(profiles)
+                profiles.append(matrix)
+            vehicle_profiles.append(profile_indexes[key])
+
+        return cls(profiles, vehicle_profiles)
+
+    def add_node(self, values):
+        """
+        extends every profile by a node, values holds one (row, column) per profile with the entries from and to all
+        nodes including the new one
+        """
+        for profile_idx, (row, column) in enumerate(values):
+            profile = self.profiles[profile_idx]
+            num_nodes = len(profile)
+            if self.is_array:
+                matrix = np.empty((num_nodes + 1, num_nodes + 1), dtype=np.result_type(profile, np.asarray(row)))
+                matrix[:num_nodes, :num_nodes] = profile
+                matrix[:, num_nodes] = column
+                matrix[num_nodes] = row
+                self.profiles[profile_idx] = matrix
+            else:
+                for node_idx, profile_row in enumerate(profile):
+                    profile_row.append(column[node_idx])
+                profile.append(list(row))
+
+    def get_subset(self, node_indexes, vehicle_indexes):
+        """
+        matrices restricted to a subset of the nodes and vehicles, renumbered in the order of node_indexes and
+        vehicle_indexes, only the profiles of the selected vehicles are kept
+        """
+        profile_indexes = sorted(set(self.vehicle_profiles[vehicle_idx] for vehicle_idx in vehicle_indexes))
+        profile_map = {profile_idx: index for index, profile_idx in enumerate(profile_indexes)}
+        if self.is_array:
+            profiles = [self.profiles[profile_idx][np.ix_(node_indexes, node_indexes)] for profile_idx in profile_indexes]
+        else:
+            profiles = [[[self.profiles[profile_idx][x][y] for y in node_indexes] for x in node_indexes] for profile_idx in profile_indexes]
+
+        node_map = {node_idx: index for index, node_idx in enumerate(node_indexes)}
+        overrides = {}
+        for index, vehicle_idx in enumerate(vehicle_indexes):
+            for (node_idx1, node_idx2), value in self.overrides.get(vehicle_idx, {}).items():
+                if node_idx1 in node_map and node_idx2 in node_map:
+                    overrides.setdefault(index, {})[(node_map[node_idx1], node_map[node_idx2])] = value
+
+        return VehicleMatrices(profiles, [profile_map[self.vehicle_profiles[vehicle_idx]] for vehicle_idx in vehicle_indexes], overrides)
+
+    def set_override(self, vehicle_idx, node_idx1, node_idx2, value):
+        self.overrides.setdefault(vehicle_idx, {})[(node_idx1, node_idx2)] = value
+
+    def item(self, vehicle_idx, node_idx1, node_idx2):
+        if self.overrides:
+            entries = self.overrides.get(vehicle_idx)
+            if entries is not None and (node_idx1, node_idx2) in entries:
+                return entries[(node_idx1, node_idx2)]
+
+        profile = self.profiles[self.vehicle_profiles[vehicle_idx]]
+        if self.is_array:
+            return profile.item(node_idx1, node_idx2)
+        return profile[node_idx1][node_idx2]
+
+    def get_matrix(self, vehicle_idx):
+        # the matrix of the vehicle, shared with its profile unless the vehicle has overrides
+        profile = self.profiles[self.vehicle_profiles[vehicle_idx]]
+        entries = self.overrides.get(vehicle_idx)
+        if not entries:
+            return profile
+
+        if self.is_array:
+            matrix = profile.copy()
+            for (node_idx1, node_idx2), value in entries.items():
+                matrix[node_idx1, node_idx2] = value
+            return matrix
+
+        # only the rows with overrides are copied
+        matrix = list(profile)
+        copied_rows = set()
+        for (node_idx1, node_idx2), value in entries.items():
+            if node_idx1 not in copied_rows:
+                matrix[node_idx1] = list(matrix[node_idx1])
+                copied_rows.add(node_idx1)
+            matrix[node_idx1][node_idx2] = value
+        return matrix
+
+    def to_dense(self):
+        return [self.get_matrix(vehicle_idx) for vehicle_idx in range(len(self.vehicle_profiles))]
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            return self.item(*key)
+        return self.get_matrix(key)
+
+    def __len__(self):
+        return len(self.vehicle_profiles)
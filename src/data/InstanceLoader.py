@@ -0,0 +1,167 @@
+from src.core.Problem import Problem
+from src.core.LazyMatrix import EuclideanMatrix
+from src.core.VehicleMatrices import VehicleMatrices
+import numpy as np
+import logging
+import json
+import os
+
+
+def read_solomon(file_path):
+    """
+    parses a homberger/solomon instance into a dict with the fleet size, the vehicle capacity and an int array of
+    shape [N, 7] with the columns: cust no., x, y, demand, ready time, due date, service time
+    """
+    with open(file_path) as f:
+        lines = f.read().splitlines()
+
+    vehicle_line = next(index for index, line in enumerate(lines) if "VEHICLE" in line)
+    num_vehicles, capacity = (int(number) for number in lines[vehicle_line + 2].split()[:2])
+
+    # the node table follows the header of the customer section, rows without 7 numbers are skipped
+    customer_line = next(index for index, line in enumerate(lines) if "CUSTOMER" in line)
+    rows = [line for line in lines[customer_line + 2:] if len(line.split()) == 7]
+    nodes = np.array(" ".join(rows).split(), dtype=np.int64).reshape(-1, 7)
+
+    return {"name": lines[0].strip(), "num_vehicles": num_vehicles, "capacity": capacity, "nodes": nodes}
+
+
+def build_problem(model, instance, storage="array", lazy=False):
+    if lazy and storage != "array":
+        # list storage holds every distance, a lazy matrix would be evaluated in full
+        logging.error(f"build_problem::lazy distances require array storage, got storage: {storage}")
+        exit(1)
+
+    nodes = instance["nodes"]
+    num_vehicles = instance["num_vehicles"]
+    xs, ys = nodes[:, 1], nodes[:, 2]
+
+    depot_indexes = [0]
+    global_attrs = {"wait_for_ready": True}
+    vehicle_attrs = {"capacity": np.full(num_vehicles, instance["capacity"]),
+                     "start_time": np.full(num_vehicles, nodes[0, 4]),
+                     "end_time": np.full(num_vehicles, nodes[0, 5]),
+                     "depot_index": np.zeros(num_vehicles, dtype=np.int64)}
+    node_attrs = {"x": xs,
+                  "y": ys,
+                  "demand": nodes[:, 3],
+                  "ready_time": nodes[:, 4],
+                  "due_time": nodes[:, 5],
+                  "service_time": nodes[:, 6]}
+    if lazy:
+        cost = EuclideanMatrix(xs, ys)
+    else:
+        cost = np.sqrt((xs[:, None] - xs[None, :]) ** 2 + (ys[:, None] - ys[None, :]) ** 2)
+    node_node_attrs = {"cost": cost}
+
+    if storage == "array":
+        return Problem.from_arrays(model, depot_indexes, global_attrs, vehicle_attrs, node_attrs, node_node_attrs, {}, num_vehicles, len(nodes))
+
+    vehicles_with_attrs = [{name: values[vehicle_idx].item() for name, values in vehicle_attrs.items()} for vehicle_idx in range(num_vehicles)]
+    nodes_with_attrs = [{name: values[node_idx].item() for name, values in node_attrs.items()} for node_idx in range(len(nodes))]
+    node_node_attrs = {name: values[:].tolist() for name, values in node_node_attrs.items()}
+    return Problem(model, depot_indexes, global_attrs, vehicles_with_attrs, nodes_with_attrs, node_node_attrs, {}, storage)
+
+
+def save_problem(problem, directory, source=None):
+    """
+    saves a problem with array storage as one .npy file per attribute and a meta.json, so that it can be loaded
+    memory-mapped by load_problem
+    """
+    if problem.storage != "array":
+        logging.error("save_problem::only problems with array storage can be saved")
+        exit(1)
+
+    os.makedirs(directory, exist_ok=True)
+    meta = {"source": source,
+            "num_vehicles": problem.num_vehicles,
+            "num_nodes": problem.num_nodes,
+            "depot_indexes": list(problem.depot_index_list),
+            "global_attrs": {attr.name: problem.get_global_attr(attr) for attr in problem.model.global_attrs},
+            "lazy_euclidean": {}}
+
+    arrays = {}
+    for attr in problem.model.vehicle_attrs:
+        arrays[f"vehicle.{attr.name}"] = problem.get_vehicle_attr_array(attr)
+    for attr in problem.model.node_attrs:
+        arrays[f"node.{attr.name}"] = problem.get_node_attr_array(attr)
+    for attr in problem.model.node_node_attrs:
+        array = problem.get_node_node_attr_array(attr)
+        if isinstance(array, EuclideanMatrix):
+            # only the coordinates of lazy distances are stored
+            meta["lazy_euclidean"][attr.name] = True
+            arrays[f"node_node.{attr.name}.x"] = array.xs
+            arrays[f"node_node.{attr.name}.y"] = array.ys
+        else:
+            arrays[f"node_node.{attr.name}"] = np.asarray(array)
+    for attr in problem.model.vehicle_node_node_attrs:
+        # one matrix per vehicle profile, the profile of each vehicle and the sparse overrides
+        matrices = problem.get_vehicle_node_node_attr_array(attr)
+        overrides = [(vehicle_idx, node_idx1, node_idx2, value) for vehicle_idx, entries in matrices.overrides.items()
+                     for (node_idx1, node_idx2), value in entries.items()]
+        arrays[f"vehicle_node_node.{attr.name}.profiles"] = np.stack(matrices.profiles) if matrices.profiles else np.empty((0, problem.num_nodes, problem.num_nodes))
+        arrays[f"vehicle_node_node.{attr.name}.vehicle_profiles"] = np.asarray(matrices.vehicle_profiles, dtype=np.int64)
+        arrays[f"vehicle_node_node.{attr.name}.override_keys"] = np.array([override[:3] for override in overrides], dtype=np.int64).reshape(-1, 3)
+        arrays[f"vehicle_node_node.{attr.name}.override_values"] = np.array([override[3] for override in overrides], dtype=float)
+    if problem.neighbour_array is not None:
+        arrays["neighbour_array"] = np.asarray(problem.neighbour_array, dtype=np.int32)
+
+    for name, array in arrays.items():
+        np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(array))
+    with open(os.path.join(directory, "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+
+def load_problem(directory, model, mmap_mode="r"):
+    with open(os.path.join(directory, "meta.json")) as f:
+        meta = json.load(f)
+
+    def load(name):
+        return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+
+    vehicle_attrs = {attr.name: load(f"vehicle.{attr.name}") for attr in model.vehicle_attrs}
+    node_attrs = {attr.name: load(f"node.{attr.name}") for attr in model.node_attrs}
+    node_node_attrs = {}
+    for attr in model.node_node_attrs:
+        if meta["lazy_euclidean"].get(attr.name):
+            node_node_attrs[attr.name] = EuclideanMatrix(load(f"node_node.{attr.name}.x"), load(f"node_node.{attr.name}.y"))
+        else:
+            node_node_attrs[attr.name] = load(f"node_node.{attr.name}")
+    vehicle_node_node_attrs = {}
+    for attr in model.vehicle_node_node_attrs:
+        matrices = VehicleMatrices(load(f"vehicle_node_node.{attr.name}.profiles"), load(f"vehicle_node_node.{attr.name}.vehicle_profiles").tolist())
+        keys = load(f"vehicle_node_node.{attr.name}.override_keys").tolist()
+        values = load(f"vehicle_node_node.{attr.name}.override_values").tolist()
+        for (vehicle_idx, node_idx1, node_idx2), value in zip(keys, values):
+            matrices.set_override(vehicle_idx, node_idx1, node_idx2, value)
+        vehicle_node_node_attrs[attr.name] = matrices
+
+    problem = Problem.from_arrays(model, meta["depot_indexes"], meta["global_attrs"], vehicle_attrs, node_attrs, node_node_attrs,
+                                  vehicle_node_node_attrs, meta["num_vehicles"], meta["num_nodes"])
+    if os.path.exists(os.path.join(directory, "neighbour_array.npy")):
+        problem.neighbour_array = load("neighbour_array")
+
+    return problem
+
+
+def load_instance(file_path, model, cache_dir=None, lazy=False):
+    """
+    loads a homberger/solomon instance with array storage, if cache_dir is given the built problem is saved there and
+    reused by later runs as long as the instance file is unchanged
+    """
+    if cache_dir is None:
+        return build_problem(model, read_solomon(file_path), lazy=lazy)
+
+    stat = os.stat(file_path)
+    source = {"path": os.path.abspath(file_path), "size": stat.st_size, "mtime": stat.st_mtime, "lazy": lazy}
+    directory = os.path.join(cache_dir, os.path.basename(file_path) + (".lazy" if lazy else ""))
+    meta_path = os.path.join(directory, "meta.json")
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            if json.load(f)["source"] == source:
+                logging.info(f"load_instance::loading cached problem from {directory}")
+                return load_problem(directory, model)
+
+    problem = build_problem(model, read_solomon(file_path), lazy=lazy)
+    save_problem(problem, directory, source)
+    return problem
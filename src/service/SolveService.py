@@ -0,0 +1,176 @@
+from src.algorithm.constructors.NearestSearch import NearestSearch
+from src.algorithm.constructors.RegretInsertion import RegretInsertion
+from src.algorithm.improvers.GranularSearch import GranularSearch
+from src.algorithm.drivers.WorkerPool import make_pool, get_worker_state
+import asyncio
+import logging
+import json
+import os
+
+
+def solve_nearest(problem, kwargs):
+    return NearestSearch(problem, **kwargs).solve()
+
+
+def solve_regret(problem, kwargs):
+    return RegretInsertion(problem, **kwargs).solve()
+
+
+def solve_granular(problem, kwargs):
+    solution = RegretInsertion(problem, **kwargs).solve()
+    return GranularSearch(problem, **kwargs).solve(solution)
+
+
+solvers = {"nearest": solve_nearest,
+           "regret": solve_regret,
+           "granular": solve_granular}
+
+
+def solve_batch(problem_name, requests):
+    # solves the (solver, kwargs) requests of one problem in a worker, only plain data is sent back
+    problem = get_worker_state()[problem_name]
+    names = [objective.name for objective in problem.model.objectives]
+    results = []
+    for solver, kwargs in requests:
+        solution = solvers[solver](problem, dict(kwargs))
+        results.append({"problem": problem_name,
+                        "solver": solver,
+                        "is_feasible": bool(solution.is_feasible),
+                        "objectives": {name: float(output) for name, output in zip(names, solution.objectives_output)},
+                        "routes": [{"vehicle_idx": route.vehicle_idx, "jobs": route.jobs.tolist()} for route in solution.routes]})
+
+    return results
+
+
+class ProblemRegistry:
+    """
+    preloaded problems by name, their neighbour lists and compiled attributes are built once when registered and the
+    problems are treated as read-only afterwards
+    """
+    def __init__(self):
+        self.problems = {}
+
+    def register(self, name, problem, neighbourhood_size=None):
+        if problem.neighbour_array is None:
+            problem.update_neighbour(neighbourhood_size or problem.num_nodes)
+        problem.compile()
+        self.problems[name] = problem
+
+    def get(self, name):
+        return self.problems.get(name)
+
+    def __contains__(self, name):
+        return name in self.problems
+
+
+class SolveService:
+    """
+    asyncio front end that solves requests on a process pool sharing the preloaded problems, identical requests in
+    flight are coalesced into one solve and requests for the same problem arriving within batch_delay seconds are
+    collected into a batch that is spread over the workers, a worker only solves several of them in turn when the batch
+    has more requests than there are workers
+    """
+    def __init__(self, registry, **kwargs):
+        self.registry = registry
+        self.num_workers = kwargs.get("num_workers", os.cpu_count())
+        self.batch_delay = kwargs.get("batch_delay", 0.002)
+        self.max_batch_size = kwargs.get("max_batch_size", 8)
+        self.coalesce = kwargs.get("coalesce", True)
+        self.executor = None
+        # futures of the requests in flight by key and the keys waiting for their batch per problem
+        self.pending = {}
+        self.batches = {}
+        self.stats = {"requests": 0, "coalesced": 0, "batches": 0, "solves": 0}
+
+    def start(self):
+        self.executor = make_pool(self.num_workers, self.registry.problems)
+        logging.info(f"{self.__class__.__name__}::started {self.num_workers} workers for {len(self.registry.problems)} problems")
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        self.close()
+
+    async def solve(self, problem_name, solver="nearest", **kwargs):
+        """
+        solves a registered problem with a solver and its keyword arguments, e.g. seed, and returns the objectives,
+        the feasibility and the routes of the solution
+        """
+        if problem_name not in self.registry:
+            raise ValueError(f"unknown problem: {problem_name}")
+        if solver not in solvers:
+            raise ValueError(f"unknown solver: {solver}")
+
+        self.stats["requests"] += 1
+        # canonical json of the kwargs, values such as the list of weights are not hashable
+        key = (problem_name, solver, json.dumps(kwargs, sort_keys=True, default=repr))
+        if self.coalesce and key in self.pending:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(self.pending[key])
+
+        future = asyncio.get_running_loop().create_future()
+        self.pending[key] = future
+        batch = self.batches.setdefault(problem_name, [])
+        batch.append((key, kwargs, future))
+        if len(batch) >= self.max_batch_size:
+            self.flush(problem_name)
+        elif len(batch) == 1:
+            asyncio.get_running_loop().call_later(self.batch_delay, self.flush, problem_name)
+
+        return await asyncio.shield(future)
+
+    def flush(self, problem_name):
+        batch = self.batches.pop(problem_name, None)
+        if not batch:
+            return
+
+        self.stats["batches"] += 1
+        self.stats["solves"] += len(batch)
+        # one task per worker, distinct requests are solved in parallel instead of one after the other
+        num_tasks = min(len(batch), self.num_workers)
+        for task_idx in range(num_tasks):
+            requests = batch[task_idx::num_tasks]
+            task = asyncio.get_running_loop().run_in_executor(self.executor, solve_batch, problem_name,
+                                                             [(solver, kwargs) for (_, solver, _), kwargs, _ in requests])
+            task.add_done_callback(lambda done, requests=requests: self.resolve(requests, done))
+
+    def resolve(self, batch, done):
+        for index, (key, _, future) in enumerate(batch):
+            if self.pending.get(key) is future:
+                del self.pending[key]
+            if future.done():
+                continue
+            if done.exception() is not None:
+                future.set_exception(done.exception())
+            else:
+                future.set_result(done.result()[index])
+
+    async def handle_connection(self, reader, writer):
+        # one json request per line, e.g. {"problem": "C1_2_1", "solver": "nearest", "kwargs": {"seed": 0}}
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+
+            try:
+                request = json.loads(line)
+                response = await self.solve(request["problem"], request.get("solver", "nearest"), **request.get("kwargs", {}))
+            except Exception as error:
+                response = {"error": str(error)}
+            writer.write((json.dumps(response) + "\n").encode())
+            await writer.drain()
+
+        writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8765):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        logging.info(f"{self.__class__.__name__}::serving on {host}:{port}")
+        async with server:
+            await server.serve_forever()
@@ -0,0 +1,106 @@
+from src.core.Model import Model
+from src.core.Problem import Problem
+import numpy as np
+import pickle
+import pytest
+
+
+class SmallModel(Model):
+    global_attributes = []
+    vehicle_attributes = ["capacity"]
+    node_attributes = ["demand"]
+    node_node_attributes = ["cost"]
+    vehicle_node_node_attributes = ["travel_time"]
+
+
+def get_problem(storage, num_nodes=5):
+    model = SmallModel().create()
+    cost = np.arange(num_nodes * num_nodes, dtype=float).reshape(num_nodes, num_nodes)
+    travel_times = [cost + 1000.0, cost + 1000.0, cost + 2000.0, cost + 1000.0]
+    vehicles = [{"capacity": 10.0 * (vehicle_idx + 1)} for vehicle_idx in range(len(travel_times))]
+    nodes = [{"demand": float(node_idx)} for node_idx in range(num_nodes)]
+    if storage == "list":
+        node_node_attrs = {"cost": cost.tolist()}
+        vehicle_node_node_attrs = {"travel_time": [matrix.tolist() for matrix in travel_times]}
+    else:
+        node_node_attrs = {"cost": cost}
+        vehicle_node_node_attrs = {"travel_time": travel_times}
+    problem = Problem(model, [0], {}, vehicles, nodes, node_node_attrs, vehicle_node_node_attrs, storage)
+    problem.vehicle_node_node_attr_matrices[0].set_override(1, 1, 2, -1.0)
+    return problem
+
+
+def add_node(problem, value):
+    num_nodes = problem.num_nodes + 1
+    row = [value + y for y in range(num_nodes)]
+    column = [value + 0.5 + x for x in range(num_nodes)]
+    profiles = [([value + 1000.0 + y for y in range(num_nodes)], [value + 1000.5 + x for x in range(num_nodes)]),
+                ([value + 2000.0 + y for y in range(num_nodes)], [value + 2000.5 + x for x in range(num_nodes)])]
+    return problem.add_node({"demand": value}, {"cost": (row, column)}, {"travel_time": profiles})
+
+
+def assert_compiled(problem):
+    attrs = problem.compiled
+    model = problem.model
+    for x in range(problem.num_nodes):
+        assert attrs.demand[x] == problem.get_node_attr(x, model.demand)
+        for y in range(problem.num_nodes):
+            assert attrs.cost[x][y] == problem.get_node_node_attr(x, y, model.cost)
+            for vehicle_idx in range(problem.num_vehicles):
+                assert attrs.travel_time[vehicle_idx][x][y] == problem.get_vehicle_node_node_attr(vehicle_idx, x, y, model.travel_time)
+        assert all(len(attrs.travel_time[vehicle_idx][x]) == problem.num_nodes for vehicle_idx in range(problem.num_vehicles))
+    assert all(len(attrs.travel_time[vehicle_idx]) == problem.num_nodes for vehicle_idx in range(problem.num_vehicles))
+
+
+@pytest.mark.parametrize("storage", ["list", "array"])
+def test_add_node_updates_compiled_attrs(storage):
+    problem = get_problem(storage)
+    problem.compile()
+    for value in [100.0, 200.0]:
+        node_idx = add_node(problem, value)
+        assert node_idx == problem.num_nodes - 1
+        assert_compiled(problem)
+
+
+@pytest.mark.parametrize("storage", ["list", "array"])
+def test_add_vehicle_shares_compiled_profile(storage):
+    problem = get_problem(storage)
+    problem.compile()
+    add_node(problem, 100.0)
+    problem.add_vehicle({"capacity": 40.0}, {"travel_time": 1})
+    add_node(problem, 200.0)
+    assert_compiled(problem)
+
+
+@pytest.mark.parametrize("storage", ["list", "array"])
+def test_pickle_compiled_problem(storage):
+    problem = get_problem(storage)
+    problem.compile()
+    add_node(problem, 100.0)
+    copy = pickle.loads(pickle.dumps(problem))
+    assert copy.compiled is None
+    copy.compile()
+    assert_compiled(copy)
+    assert problem.compiled is not None
+
+
+@pytest.mark.parametrize("storage", ["list", "array"])
+@pytest.mark.parametrize("spatial", [False, True])
+def test_rebuilt_neighbours_skip_removed_nodes(storage, spatial):
+    problem = get_problem(storage, num_nodes=6)
+    if spatial:
+        problem.set_spatial_index(problem.model.demand, problem.model.demand)
+    else:
+        problem.set_closeness(problem.model.cost)
+    problem.update_neighbour(5)
+    # with array storage the lists no longer fit five neighbours, which rebuilds all of them
+    problem.remove_node(2)
+    for num_neighbours in [None, 2]:
+        if num_neighbours is not None:
+            problem.update_neighbour(num_neighbours)
+        for node_idx in range(problem.num_nodes):
+            assert 2 not in problem.get_neighbours(node_idx)
+            assert node_idx not in problem.get_neighbours(node_idx)
+    if spatial:
+        assert problem.get_nearest(1, 2) == [0, 3]
+        assert problem.get_within(1, 3.0) == [0, 3]
@@ -0,0 +1,218 @@
+from src.core.Model import Objective, Constraint, Model
+from src.core.Problem import Problem
+from src.core.Profiler import Profiler
+from src.core.Solution import Solution, Route
+import numpy as np
+import logging
+import random
+import pytest
+
+
+def calc_distance(solution):
+    cost = solution.problem.compile().cost
+    distance = 0.0
+    for route in solution.routes:
+        prev_node = 0
+        for job in route.jobs:
+            distance += cost[prev_node][job]
+            prev_node = job
+        distance += cost[prev_node][0]
+    return distance
+
+
+def capacity_constraint(solution):
+    attrs = solution.problem.compile()
+    return all(sum(attrs.demand[job] for job in route.jobs) <= attrs.capacity[route.vehicle_idx] for route in solution.routes)
+
+
+def calc_route_load(problem, route):
+    demand = problem.compile().demand
+    return sum(demand[job] for job in route.jobs)
+
+
+def capacity_route_constraint(problem, route):
+    return calc_route_load(problem, route) <= problem.compile().capacity[route.vehicle_idx]
+
+
+def capacity_insertion(problem, route, load, index, job):
+    attrs = problem.compile()
+    return load + attrs.demand[job] <= attrs.capacity[route.vehicle_idx]
+
+
+class PlainModel(Model):
+    # constraints given as plain functions of the solution, as the baseline constraint api allows
+    global_attributes = []
+    vehicle_attributes = ["capacity"]
+    node_attributes = ["demand"]
+    node_node_attributes = ["cost"]
+    vehicle_node_node_attributes = []
+    objectives = [Objective(calc_distance, "distance")]
+    constraints = [capacity_constraint]
+
+
+class RouteModel(PlainModel):
+    constraints = [Constraint(capacity_constraint, "capacity", capacity_route_constraint, calc_route_load, capacity_insertion)]
+
+
+def get_problem(model, storage, num_nodes=8, num_vehicles=3, seed=0):
+    rng = np.random.default_rng(seed)
+    points = rng.random((num_nodes, 2)) * 100.0
+    cost = np.hypot(points[:, None, 0] - points[None, :, 0], points[:, None, 1] - points[None, :, 1])
+    vehicles = [{"capacity": 4.0} for _ in range(num_vehicles)]
+    nodes = [{"demand": 0.0 if node_idx == 0 else 1.0} for node_idx in range(num_nodes)]
+    node_node_attrs = {"cost": cost.tolist() if storage == "list" else cost}
+    return Problem(model.create(), [0], {}, vehicles, nodes, node_node_attrs, {}, storage)
+
+
+@pytest.mark.parametrize("storage", ["list", "array"])
+def test_profiler_with_plain_constraints(storage):
+    problem = get_problem(PlainModel(), storage)
+    problem.set_profiler(Profiler())
+    solution = Solution(problem)
+    solution.add_route(Route(0, [1, 2, 3]))
+    solution.add_route(Route(1, [4, 5, 6, 7]))
+    solution.eval_solution()
+    assert solution.is_feasible
+    assert "constraint.capacity_constraint" in problem.profiler.timers
+
+    solution.insert_job(solution.routes[1], 0, solution.remove_job(solution.routes[0], 0))
+    assert not solution.eval_constraint()
+
+
+def assert_route_caches(solution):
+    # cached route results may be filled in after a commit, they only have to be those of the current jobs
+    for route in solution.routes:
+        if route.is_feasible is not None:
+            assert route.is_feasible == capacity_route_constraint(solution.problem, route)
+        for profile_function, profile in route.profiles.items():
+            assert profile == profile_function(solution.problem, route)
+
+
+def get_state(solution):
+    # a deep copy of everything a rollback has to restore, the routes are compared by identity too
+    assert_route_caches(solution)
+    return {"routes": [(id(route), route.vehicle_idx, route.jobs.tolist()) for route in solution.routes],
+            "unassigned_jobs": set(solution.unassigned_jobs),
+            "job_locations": {job: (id(route), index) for job, (route, index) in solution.job_locations.items()},
+            "vehicle_routes": {vehicle_idx: id(route) for vehicle_idx, route in solution.vehicle_routes.items()},
+            "objectives_output": list(solution.objectives_output),
+            "is_feasible": solution.is_feasible}
+
+
+def get_solution(storage):
+    problem = get_problem(RouteModel(), storage, num_nodes=12, num_vehicles=4)
+    solution = Solution(problem)
+    solution.add_route(Route(0, [1, 2, 3]))
+    solution.add_route(Route(1, [4, 5, 6, 7]))
+    solution.add_route(Route(2, [8]))
+    solution.eval_solution()
+    # fill the cached profiles that the moves have to invalidate and the rollback has to bring back
+    for route in solution.routes:
+        solution.get_route_profile(route, calc_route_load)
+    solution.get_fingerprint()
+    return solution
+
+
+def apply_random_moves(solution, generator, num_moves):
+    for _ in range(num_moves):
+        routes = [route for route in solution.routes if len(route.jobs) > 0]
+        move = generator.randrange(7)
+        if move == 0 and solution.unassigned_jobs and solution.routes:
+            job = generator.choice(sorted(solution.unassigned_jobs))
+            route = generator.choice(solution.routes)
+            solution.remove_unassigned_job(job)
+            solution.insert_job(route, generator.randint(0, len(route.jobs)), job)
+        elif move == 1 and routes:
+            route = generator.choice(routes)
+            solution.add_unassigned_job(solution.remove_job(route, generator.randrange(len(route.jobs))))
+        elif move == 2 and routes:
+            route = generator.choice(routes)
+            job = solution.remove_job(route, generator.randrange(len(route.jobs)))
+            other = generator.choice(routes)
+            solution.insert_job(other, generator.randint(0, len(other.jobs)), job)
+        elif move == 3 and routes:
+            route = generator.choice(routes)
+            start = generator.randrange(len(route.jobs))
+            jobs = solution.remove_segment(route, start, generator.randint(start + 1, len(route.jobs)))
+            other = generator.choice(solution.routes)
+            solution.insert_segment(other, generator.randint(0, len(other.jobs)), jobs)
+        elif move == 4 and routes and solution.unassigned_jobs:
+            route = generator.choice(routes)
+            job = generator.choice(sorted(solution.unassigned_jobs))
+            solution.remove_unassigned_job(job)
+            solution.add_unassigned_job(solution.replace_job(route, generator.randrange(len(route.jobs)), job))
+        elif move == 5:
+            unused = [vehicle_idx for vehicle_idx in solution.problem.vehicle_indexes if solution.get_route(vehicle_idx) is None]
+            if unused:
+                solution.add_route(Route(generator.choice(unused)))
+        elif move == 6 and solution.routes:
+            route = generator.choice(solution.routes)
+            solution.remove_route(route)
+            for job in route.jobs:
+                solution.add_unassigned_job(job)
+        # evaluations in between change the cached results as a search would
+        if generator.random() < 0.3:
+            solution.eval_constraint()
+            solution.eval_objective()
+            solution.get_fingerprint()
+
+
+@pytest.mark.parametrize("storage", ["list", "array"])
+@pytest.mark.parametrize("seed", range(20))
+def test_rollback_restores_solution(storage, seed):
+    solution = get_solution(storage)
+    generator = random.Random(seed)
+    expected = get_state(solution)
+    solution.begin()
+    apply_random_moves(solution, generator, 10)
+    solution.rollback()
+    assert get_state(solution) == expected
+
+    # a commit moves the point a rollback returns to
+    apply_random_moves(solution, generator, 5)
+    solution.eval_constraint()
+    solution.eval_objective()
+    solution.commit()
+    expected = get_state(solution)
+    apply_random_moves(solution, generator, 10)
+    solution.rollback()
+    assert get_state(solution) == expected
+    assert solution.journal == []
+    solution.end()
+
+
+@pytest.mark.parametrize("storage", ["list", "array"])
+def test_second_begin_restarts_transaction(storage):
+    solution = get_solution(storage)
+    generator = random.Random(0)
+    solution.begin()
+    apply_random_moves(solution, generator, 5)
+    expected = get_state(solution)
+    solution.begin()
+    apply_random_moves(solution, generator, 5)
+    solution.rollback()
+    assert get_state(solution) == expected
+
+
+@pytest.mark.parametrize("storage", ["list", "array"])
+def test_rollback_without_transaction(storage, caplog):
+    solution = get_solution(storage)
+    solution.begin()
+    apply_random_moves(solution, random.Random(0), 5)
+    solution.end()
+    assert solution.journal is None
+    apply_random_moves(solution, random.Random(1), 5)
+    expected = get_state(solution)
+    with caplog.at_level(logging.WARNING):
+        solution.rollback()
+    assert "no transaction to roll back" in caplog.text
+    assert get_state(solution) == expected
+    assert solution.journal is None
+
+
+def test_transactional_cache_is_ended():
+    from src.algorithm.constructors.NearestSearch import NearestSearch
+    problem = get_problem(RouteModel(), "array", num_nodes=12, num_vehicles=4)
+    problem.set_closeness(problem.model.cost)
+    solution = NearestSearch(problem, neighbourhood_size=5).solve()
+    assert solution.journal is None
@@ -0,0 +1,20 @@
+from src.core.SpatialIndex import SpatialIndex
+import numpy as np
+
+
+def test_collinear_points_bound_the_grid():
+    xs = np.arange(10000, dtype=float)
+    ys = np.zeros(10000)
+    index = SpatialIndex(xs, ys)
+    assert index.num_cols * index.num_rows <= 10000
+    assert index.query_knn(5000.0, 0.0, 3).tolist() == [5000, 4999, 5001]
+
+
+def test_knn_matches_brute_force():
+    rng = np.random.default_rng(0)
+    xs, ys = rng.random(500), rng.random(500)
+    index = SpatialIndex(xs, ys)
+    for node_idx in range(0, 500, 50):
+        distances = np.hypot(xs - xs[node_idx], ys - ys[node_idx])
+        expected = [idx for idx in np.lexsort((np.arange(500), distances)).tolist() if idx != node_idx][:10]
+        assert index.query_knn(xs[node_idx], ys[node_idx], 10, exclude=node_idx).tolist() == expected
@@ -1,4 +1,4 @@
-from src.core.Model import Objective, Model
+from src.core.Model import Objective, Constraint, Model
 
 
 # define functions to retrieve the attributes
@@ -38,93 +38,256 @@ def get_cost(problem, prev_node_index, current_node_index):
     return problem.get_node_node_attr(prev_node_index, current_node_index, problem.model.cost)
 
 
+# define route profiles
+class RouteProfile:
+    """
+    forward/backward data of a route for constant time insertion checks, positions index the nodes of the route
+    including the depot at both ends
+    """
+    def __init__(self, problem, route):
+        attrs = problem.compile()
+        cost, ready_time, due_time, service_time = attrs.cost, attrs.ready_time, attrs.due_time, attrs.service_time
+        depot = attrs.depot_index[route.vehicle_idx]
+        self.nodes = nodes = [depot] + route.jobs.tolist() + [depot]
+        demand = attrs.demand
+        self.load = 0.0
+        for job in route.jobs:
+            self.load += demand[job]
+
+        # earliest departure time at each position
+        departure = attrs.start_time[route.vehicle_idx]
+        self.departure = [departure]
+        for position in range(1, len(nodes) - 1):
+            node = nodes[position]
+            arrival_time = departure + cost[nodes[position - 1]][node]
+            departure = max(arrival_time, ready_time[node]) + service_time[node]
+            self.departure.append(departure)
+
+        # latest arrival time at each position that keeps the rest of the route feasible
+        self.latest_arrival = latest_arrival = [0.0] * len(nodes)
+        latest_arrival[-1] = attrs.end_time[route.vehicle_idx]
+        for position in range(len(nodes) - 2, 0, -1):
+            node = nodes[position]
+            latest_departure = latest_arrival[position + 1] - cost[node][nodes[position + 1]]
+            if ready_time[node] + service_time[node] > latest_departure:
+                latest_arrival[position] = float("-inf")
+            else:
+                latest_arrival[position] = min(due_time[node], latest_departure - service_time[node])
+
+        # arrival time back at the depot
+        self.return_time = departure + cost[nodes[-2]][nodes[-1]]
+
+
+def route_profile(problem, route):
+    return RouteProfile(problem, route)
+
+
 # define objectives
 def calc_num_unassigned_jobs(solution):
     return len(solution.unassigned_jobs)
 
 
+def calc_route_num_vehicles(problem, route):
+    return 1 if len(route.jobs) > 0 else 0
+
+
 def calc_num_vehicles(solution):
     num_vehicles = 0
     for route in solution.routes:
-        if len(route.jobs) > 0:
-            num_vehicles += 1
+        num_vehicles += calc_route_num_vehicles(solution.problem, route)
 
     return num_vehicles
 
 
+def calc_route_distance(problem, route):
+    if len(route.jobs) == 0:
+        return 0.0
+
+    attrs = problem.compile()
+    cost = attrs.cost
+    depot = attrs.depot_index[route.vehicle_idx]
+    route_distance = 0.0
+    prev_job = depot
+    for job in route.jobs:
+        route_distance += cost[prev_job][job]
+        prev_job = job
+    route_distance += cost[job][depot]
+
+    return route_distance
+
+
 def calc_distance(solution):
     solution_distance = 0.0
     for route in solution.routes:
-        depot = get_depot_index(solution.problem, route.vehicle_idx)
-        route_distance = 0.0
-        prev_job = depot
-        for job in route.jobs:
-            route_distance += get_cost(solution.problem, prev_job, job)
-            prev_job = job
-        route_distance += get_cost(solution.problem, job, depot)
-        solution_distance += route_distance
+        solution_distance += calc_route_distance(solution.problem, route)
 
     return solution_distance
 
 
+def calc_route_time(problem, route):
+    if len(route.jobs) == 0:
+        return 0.0
+
+    attrs = problem.compile()
+    cost, ready_time, service_time = attrs.cost, attrs.ready_time, attrs.service_time
+    depot = attrs.depot_index[route.vehicle_idx]
+    route_time = 0.0
+    prev_job = depot
+    leave_time = attrs.start_time[route.vehicle_idx]
+    for job in route.jobs:
+        travel_cost = cost[prev_job][job]
+        arrival_time = leave_time + travel_cost
+        waiting_time = max(0, ready_time[job] - arrival_time)
+        leave_time = arrival_time + waiting_time + service_time[job]
+        route_time += (travel_cost + waiting_time + service_time[job])
+        prev_job = job
+    route_time += cost[job][depot]
+
+    return route_time
+
+
 def calc_time(solution):
     solution_time = 0.0
     for route in solution.routes:
-        depot = get_depot_index(solution.problem, route.vehicle_idx)
-        route_time = 0.0
-        prev_job = depot
-        leave_time = get_start_time(solution.problem, route.vehicle_idx)
-        for job in route.jobs:
-            cost = get_cost(solution.problem, prev_job, job)
-            service_time = get_service_time(solution.problem, job)
-            ready_time = get_ready_time(solution.problem, job)
-
-            arrival_time = leave_time + cost
-            waiting_time = max(0, ready_time - arrival_time)
-            leave_time = arrival_time + waiting_time + service_time
-            route_time += (cost + waiting_time + service_time)
-            prev_job = job
-        route_time += get_cost(solution.problem, job, depot)
-        solution_time += route_time
+        solution_time += calc_route_time(solution.problem, route)
 
     return solution_time
 
 
+# define objective deltas, insertion assumes the job is unassigned and removal unassigns the job
+def calc_num_unassigned_jobs_insertion_delta(solution, route, index, job):
+    return -1
+
+
+def calc_num_unassigned_jobs_removal_delta(solution, route, index):
+    return 1
+
+
+def calc_num_vehicles_insertion_delta(solution, route, index, job):
+    return 1 if len(route.jobs) == 0 else 0
+
+
+def calc_num_vehicles_removal_delta(solution, route, index):
+    return -1 if len(route.jobs) == 1 else 0
+
+
+def calc_distance_insertion_delta(solution, route, index, job):
+    cost = solution.problem.compile().cost
+    profile = solution.get_route_profile(route, route_profile)
+    prev_node = profile.nodes[index]
+    next_node = profile.nodes[index + 1]
+    return cost[prev_node][job] + cost[job][next_node] - cost[prev_node][next_node]
+
+
+def calc_distance_removal_delta(solution, route, index):
+    cost = solution.problem.compile().cost
+    profile = solution.get_route_profile(route, route_profile)
+    prev_node = profile.nodes[index]
+    node = profile.nodes[index + 1]
+    next_node = profile.nodes[index + 2]
+    return cost[prev_node][next_node] - cost[prev_node][node] - cost[node][next_node]
+
+
+def calc_return_time(problem, profile, prev_node, leave_time, position):
+    # propagate a new leave time at prev_node through the route from position, stopping once it is absorbed by waiting
+    attrs = problem.compile()
+    cost, ready_time, service_time = attrs.cost, attrs.ready_time, attrs.service_time
+    nodes, departure = profile.nodes, profile.departure
+    for position in range(position, len(nodes) - 1):
+        node = nodes[position]
+        arrival_time = leave_time + cost[prev_node][node]
+        leave_time = max(arrival_time, ready_time[node]) + service_time[node]
+        if leave_time == departure[position]:
+            return profile.return_time
+        prev_node = node
+
+    return leave_time + cost[prev_node][nodes[-1]]
+
+
+def calc_time_insertion_delta(solution, route, index, job):
+    attrs = solution.problem.compile()
+    profile = solution.get_route_profile(route, route_profile)
+    arrival_time = profile.departure[index] + attrs.cost[profile.nodes[index]][job]
+    leave_time = max(arrival_time, attrs.ready_time[job]) + attrs.service_time[job]
+    return calc_return_time(solution.problem, profile, job, leave_time, index + 1) - profile.return_time
+
+
+def calc_time_removal_delta(solution, route, index):
+    profile = solution.get_route_profile(route, route_profile)
+    if len(route.jobs) == 1:
+        return profile.departure[0] - profile.return_time
+
+    return calc_return_time(solution.problem, profile, profile.nodes[index], profile.departure[index], index + 2) - profile.return_time
+
+
 # define constraints
+def time_window_route_constraint(problem, route):
+    if len(route.jobs) == 0:
+        return True
+
+    attrs = problem.compile()
+    cost, ready_time, due_time, service_time = attrs.cost, attrs.ready_time, attrs.due_time, attrs.service_time
+    depot = attrs.depot_index[route.vehicle_idx]
+    prev_job = depot
+    leave_time = attrs.start_time[route.vehicle_idx]
+    for job in route.jobs:
+        arrival_time = leave_time + cost[prev_job][job]
+        if arrival_time > due_time[job]:
+            return False
+
+        leave_time = max(arrival_time, ready_time[job]) + service_time[job]
+        prev_job = job
+
+    end_time = leave_time + cost[job][depot]
+    if end_time > attrs.end_time[route.vehicle_idx]:
+        return False
+
+    return True
+
+
+def time_window_insertion(problem, route, profile, index, job):
+    attrs = problem.compile()
+    cost = attrs.cost
+    prev_node = profile.nodes[index]
+    next_node = profile.nodes[index + 1]
+    arrival_time = profile.departure[index] + cost[prev_node][job]
+    if arrival_time > attrs.due_time[job]:
+        return False
+
+    leave_time = max(arrival_time, attrs.ready_time[job]) + attrs.service_time[job]
+    return leave_time + cost[job][next_node] <= profile.latest_arrival[index + 1]
+
+
 def time_window_constraint(solution):
     for route in solution.routes:
-        depot = get_depot_index(solution.problem, route.vehicle_idx)
-        prev_job = depot
-        leave_time = get_start_time(solution.problem, route.vehicle_idx)
-        for job in route.jobs:
-            cost = get_cost(solution.problem, prev_job, job)
-            service_time = get_service_time(solution.problem, job)
-            ready_time = get_ready_time(solution.problem, job)
-            due_time = get_due_time(solution.problem, job)
-
-            arrival_time = leave_time + cost
-            waiting_time = max(0, ready_time - arrival_time)
-            delay_time = max(0, arrival_time - due_time)
-            leave_time = arrival_time + waiting_time + service_time
-            prev_job = job
-            if delay_time > 0:
-                return False
-
-        end_time = leave_time + get_cost(solution.problem, job, depot)
-        if end_time > get_end_time(solution.problem, route.vehicle_idx):
+        if not time_window_route_constraint(solution.problem, route):
             return False
 
     return True
 
 
+def vehicle_capacity_route_constraint(problem, route):
+    attrs = problem.compile()
+    demand = attrs.demand
+    vehicle_capacity = attrs.capacity[route.vehicle_idx]
+    route_demand = 0.0
+    for job in route.jobs:
+        route_demand += demand[job]
+        if route_demand > vehicle_capacity:
+            return False
+
+    return True
+
+
+def vehicle_capacity_insertion(problem, route, profile, index, job):
+    attrs = problem.compile()
+    return profile.load + attrs.demand[job] <= attrs.capacity[route.vehicle_idx]
+
+
 def vehicle_capacity_constraint(solution):
     for route in solution.routes:
-        vehicle_capacity = get_capacity(solution.problem, route.vehicle_idx)
-        route_demand = 0.0
-        for job in route.jobs:
-            route_demand += get_demand(solution.problem, job)
-            if route_demand > vehicle_capacity:
-                return False
+        if not vehicle_capacity_route_constraint(solution.problem, route):
+            return False
 
     return True
 
@@ -136,8 +299,9 @@ class Homberger(Model):
     node_attributes = ["x", "y", "demand", "ready_time", "due_time", "service_time"]
     node_node_attributes = ["cost"]
     vehicle_node_node_attributes = []
-    objectives = [Objective(calc_num_unassigned_jobs, "num_unassigned_jobs"),
-                  Objective(calc_num_vehicles, "num_vehicles"),
-                  Objective(calc_distance, "distance"),
-                  Objective(calc_time, "time")]
-    constraints = [time_window_constraint, vehicle_capacity_constraint]
+    objectives = [Objective(calc_num_unassigned_jobs, "num_unassigned_jobs", calc_num_unassigned_jobs_insertion_delta, calc_num_unassigned_jobs_removal_delta),
+                  Objective(calc_num_vehicles, "num_vehicles", calc_num_vehicles_insertion_delta, calc_num_vehicles_removal_delta, calc_route_num_vehicles),
+                  Objective(calc_distance, "distance", calc_distance_insertion_delta, calc_distance_removal_delta, calc_route_distance),
+                  Objective(calc_time, "time", calc_time_insertion_delta, calc_time_removal_delta, calc_route_time)]
+    constraints = [Constraint(time_window_constraint, "time_window", time_window_route_constraint, route_profile, time_window_insertion),
+                   Constraint(vehicle_capacity_constraint, "vehicle_capacity", vehicle_capacity_route_constraint, route_profile, vehicle_capacity_insertion)]
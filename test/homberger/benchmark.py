@@ -0,0 +1,217 @@
+from run import get_problem
+from src.algorithm.constructors.NearestSearch import NearestSearch
+from src.algorithm.constructors.RegretInsertion import RegretInsertion
+from src.algorithm.improvers.GranularSearch import GranularSearch
+from src.algorithm.metaheuristics.AnytimeSearch import AnytimeSearch
+from src.algorithm.drivers.Decomposition import Decomposition
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import argparse
+import platform
+import resource
+import logging
+import json
+import glob
+import time
+import sys
+import os
+# only warnings of the solvers are shown, the results are printed per case
+logging.getLogger().setLevel(logging.WARNING)
+
+
+# define the benchmarked solvers, every solver starts from the same seeded construction
+def solve_nearest(problem, seed, args):
+    return NearestSearch(problem, neighbourhood_size=args.neighbourhood_size, seed=seed).solve()
+
+
+def solve_regret(problem, seed, args):
+    return RegretInsertion(problem, neighbourhood_size=args.neighbourhood_size, granularity=args.granularity).solve()
+
+
+def solve_granular(problem, seed, args):
+    solution = solve_nearest(problem, seed, args)
+    return GranularSearch(problem, granularity=args.granularity, strategy="first").solve(solution)
+
+
+def solve_anytime(problem, seed, args):
+    solution = solve_nearest(problem, seed, args)
+    return AnytimeSearch(problem, time_limit=args.time_limit, granularity=args.granularity, seed=seed).solve(solution)
+
+
+def solve_decomposition(problem, seed, args):
+    return Decomposition(problem, neighbourhood_size=args.neighbourhood_size, granularity=args.granularity, cluster_size=args.cluster_size).solve()
+
+
+solvers = {"nearest": solve_nearest,
+           "regret": solve_regret,
+           "granular": solve_granular,
+           "anytime": solve_anytime,
+           "decomposition": solve_decomposition}
+
+
+def run_case(file_path, solver, seed, args):
+    """
+    solves one instance with one solver and seed, it runs in a fresh worker process so that the peak memory is
+    measured for this case only
+    """
+    start_time = time.perf_counter()
+    problem = get_problem(file_path, storage=args.storage, cache_dir=args.cache_dir)
+    problem.set_closeness(problem.model.cost)
+    load_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    solution = solvers[solver](problem, seed, args)
+    wall_time = time.perf_counter() - start_time
+
+    names = [objective.name for objective in problem.model.objectives]
+    # ru_maxrss is in kilobytes on linux and in bytes on macos
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_memory_mb = max_rss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+    return {"instance": get_instance_name(file_path),
+            "solver": solver,
+            "seed": seed,
+            "is_feasible": bool(solution.is_feasible),
+            "objectives": {name: float(output) for name, output in zip(names, solution.objectives_output)},
+            "load_time": load_time,
+            "wall_time": wall_time,
+            "peak_memory_mb": peak_memory_mb}
+
+
+def get_instance_name(file_path):
+    return os.path.splitext(os.path.basename(file_path))[0].upper()
+
+
+def get_gap(result, bks):
+    # difference in vehicles and relative distance gap to the best-known solution
+    if bks is None:
+        return None
+
+    return {"num_vehicles": result["objectives"]["num_vehicles"] - bks["num_vehicles"],
+            "distance_percent": 100.0 * (result["objectives"]["distance"] - bks["distance"]) / bks["distance"]}
+
+
+def run_benchmark(args):
+    file_paths = sorted({path for pattern in ["*.TXT", "*.txt"] for path in glob.glob(os.path.join(args.instances, pattern))})
+    if args.filter:
+        file_paths = [path for path in file_paths if any(get_instance_name(path).startswith(prefix.upper()) for prefix in args.filter)]
+    if not file_paths:
+        logging.error(f"run_benchmark::no instances found in {args.instances}")
+        exit(1)
+
+    bks = {}
+    if args.bks and os.path.exists(args.bks):
+        with open(args.bks) as f:
+            bks = {name.upper(): value for name, value in json.load(f).items()}
+
+    cases = [(path, solver, seed) for path in file_paths for solver in args.solvers for seed in args.seeds]
+    logging.warning(f"run_benchmark::running {len(cases)} cases on {args.workers} workers")
+
+    # every case runs in its own spawned process, one at a time per worker
+    results = []
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=context, max_tasks_per_child=1) as executor:
+        futures = [executor.submit(run_case, path, solver, seed, args) for path, solver, seed in cases]
+        for future in futures:
+            result = future.result()
+            result["bks"] = bks.get(result["instance"])
+            result["gap"] = get_gap(result, result["bks"])
+            results.append(result)
+            print(format_result(result))
+
+    output = {"meta": {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                       "python": platform.python_version(),
+                       "platform": platform.platform(),
+                       "args": {name: value for name, value in vars(args).items() if name != "function"}},
+              "results": results}
+    with open(args.output, "w") as f:
+        json.dump(output, f, indent=2)
+    print(f"results written to {args.output}")
+
+
+def format_result(result):
+    objectives = ", ".join(f"{name}: {round(value, 2)}" for name, value in result["objectives"].items())
+    gap = "" if result["gap"] is None else f", gap: {result['gap']['num_vehicles']:+.0f} vehicles {result['gap']['distance_percent']:+.2f}%"
+    return (f"{result['instance']} {result['solver']} seed {result['seed']} ({result['wall_time']:.2f}s, {result['peak_memory_mb']:.0f}MB): "
+            f"feasible: {result['is_feasible']}, {objectives}{gap}")
+
+
+def is_worse(base, new, tolerance):
+    # lexicographic comparison of the objective vectors ignoring differences within the tolerance
+    if base["is_feasible"] and not new["is_feasible"]:
+        return True
+    for name, base_value in base["objectives"].items():
+        new_value = new["objectives"].get(name, base_value)
+        if new_value > base_value + tolerance:
+            return True
+        if new_value < base_value - tolerance:
+            return False
+
+    return False
+
+
+def compare(args):
+    """
+    compares two result files case by case and flags slower, larger or worse results, exits with 1 if any is found
+    """
+    with open(args.base) as f:
+        base_results = {(result["instance"], result["solver"], result["seed"]): result for result in json.load(f)["results"]}
+    with open(args.new) as f:
+        new_results = {(result["instance"], result["solver"], result["seed"]): result for result in json.load(f)["results"]}
+
+    regressions = []
+    for key in sorted(base_results.keys() & new_results.keys()):
+        base, new = base_results[key], new_results[key]
+        flags = []
+        if new["wall_time"] > base["wall_time"] * (1 + args.time_tolerance) and new["wall_time"] - base["wall_time"] > args.min_time:
+            flags.append(f"time {base['wall_time']:.2f}s -> {new['wall_time']:.2f}s")
+        if new["peak_memory_mb"] > base["peak_memory_mb"] * (1 + args.memory_tolerance):
+            flags.append(f"memory {base['peak_memory_mb']:.0f}MB -> {new['peak_memory_mb']:.0f}MB")
+        if is_worse(base, new, args.objective_tolerance):
+            flags.append(f"objectives {list(base['objectives'].values())} -> {list(new['objectives'].values())}")
+
+        speedup = base["wall_time"] / new["wall_time"] if new["wall_time"] > 0 else float("inf")
+        print(f"{key[0]} {key[1]} seed {key[2]}: {base['wall_time']:.2f}s -> {new['wall_time']:.2f}s ({speedup:.2f}x)"
+              + (f" REGRESSION: {'; '.join(flags)}" if flags else ""))
+        if flags:
+            regressions.append(key)
+
+    for key in sorted(base_results.keys() - new_results.keys()):
+        print(f"{key[0]} {key[1]} seed {key[2]}: missing from {args.new}")
+
+    print(f"{len(regressions)} regressions in {len(base_results.keys() & new_results.keys())} common cases")
+    if regressions:
+        exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="benchmark the solvers on a directory of homberger/solomon instances")
+    subparsers = parser.add_subparsers(required=True)
+
+    run_parser = subparsers.add_parser("run", help="run the solvers and write the results as json")
+    run_parser.add_argument("instances", help="directory of instance files")
+    run_parser.add_argument("--filter", nargs="*", default=None, help="instance name prefixes, e.g. C1 RC2")
+    run_parser.add_argument("--solvers", nargs="+", default=["nearest", "granular"], choices=sorted(solvers))
+    run_parser.add_argument("--seeds", nargs="+", type=int, default=[0])
+    run_parser.add_argument("--output", default="benchmark.json")
+    run_parser.add_argument("--bks", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "bks.json"), help="json of best-known solutions")
+    run_parser.add_argument("--workers", type=int, default=1, help="cases run concurrently, 1 gives the most stable timings")
+    run_parser.add_argument("--storage", default="array", choices=["list", "array"])
+    run_parser.add_argument("--cache-dir", default="cache")
+    run_parser.add_argument("--neighbourhood-size", type=int, default=100)
+    run_parser.add_argument("--granularity", type=int, default=20)
+    run_parser.add_argument("--time-limit", type=float, default=10.0, help="time limit of the anytime solver in seconds")
+    run_parser.add_argument("--cluster-size", type=int, default=200, help="jobs per cluster of the decomposition solver")
+    run_parser.set_defaults(function=run_benchmark)
+
+    compare_parser = subparsers.add_parser("compare", help="flag regressions between two result files")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--time-tolerance", type=float, default=0.1, help="allowed relative slowdown")
+    compare_parser.add_argument("--min-time", type=float, default=0.05, help="slowdowns below this many seconds are ignored")
+    compare_parser.add_argument("--memory-tolerance", type=float, default=0.1, help="allowed relative increase of peak memory")
+    compare_parser.add_argument("--objective-tolerance", type=float, default=1e-6)
+    compare_parser.set_defaults(function=compare)
+
+    args = parser.parse_args()
+    args.function(args)
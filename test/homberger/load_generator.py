@@ -0,0 +1,88 @@
+from run import get_problem
+from src.service.SolveService import ProblemRegistry, SolveService
+import argparse
+import asyncio
+import logging
+import random
+import time
+import json
+import os
+# only warnings of the service and the solvers are shown
+logging.getLogger().setLevel(logging.WARNING)
+
+
+def get_percentile(values, percentile):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(percentile / 100 * (len(values) - 1))))]
+
+
+async def send_request(host, port, payload):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write((json.dumps(payload) + "\n").encode())
+    await writer.drain()
+    response = json.loads(await reader.readline())
+    writer.close()
+    return response
+
+
+async def generate_load(args, solve):
+    """
+    sends num_requests solve requests with at most concurrency in flight, seeds are drawn from a small range so that
+    some requests overlap, and reports the latency percentiles and the throughput
+    """
+    generator = random.Random(0)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def run_request():
+        async with semaphore:
+            start_time = time.perf_counter()
+            await solve(args.solver, {"seed": generator.randrange(args.num_seeds), "neighbourhood_size": args.neighbourhood_size})
+            latencies.append(time.perf_counter() - start_time)
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*[run_request() for _ in range(args.num_requests)])
+    elapsed = time.perf_counter() - start_time
+
+    print(f"{len(latencies)} requests in {elapsed:.2f}s, throughput: {len(latencies) / elapsed:.1f} requests/s")
+    print(f"latency p50: {1000 * get_percentile(latencies, 50):.1f}ms, p99: {1000 * get_percentile(latencies, 99):.1f}ms")
+
+
+async def main(args):
+    if args.connect:
+        # load a service running elsewhere through its json lines endpoint
+        host, port = args.connect.split(":")
+        await generate_load(args, lambda solver, kwargs: send_request(host, int(port), {"problem": args.name, "solver": solver, "kwargs": kwargs}))
+        return
+
+    registry = ProblemRegistry()
+    problem = get_problem(args.instance, storage="array", cache_dir="cache")
+    problem.set_closeness(problem.model.cost)
+    registry.register(args.name, problem, args.neighbourhood_size)
+
+    async with SolveService(registry, num_workers=args.workers, batch_delay=args.batch_delay, coalesce=not args.no_coalesce) as service:
+        if args.serve:
+            await service.serve(port=args.port)
+            return
+
+        await generate_load(args, lambda solver, kwargs: service.solve(args.name, solver, **kwargs))
+        print(f"service stats: {service.stats}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="load test of the solve service")
+    parser.add_argument("--instance", default="problems/C1_2_1.TXT")
+    parser.add_argument("--name", default="C1_2_1", help="name of the problem in the registry")
+    parser.add_argument("--solver", default="nearest")
+    parser.add_argument("--num-requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--num-seeds", type=int, default=50, help="requests draw their seed from this many seeds")
+    parser.add_argument("--neighbourhood-size", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--batch-delay", type=float, default=0.002)
+    parser.add_argument("--no-coalesce", action="store_true")
+    parser.add_argument("--serve", action="store_true", help="serve json lines requests instead of generating load")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--connect", default=None, help="host:port of a running service to load")
+    args = parser.parse_args()
+    asyncio.run(main(args))
@@ -1,72 +1,36 @@
-import math
-from src.core.Problem import Problem
+from src.data.InstanceLoader import read_solomon, build_problem, load_instance
 from src.algorithm.constructors.NearestSearch import NearestSearch
-from Homberger import Homberger, get_cost
+from src.algorithm.improvers.GranularSearch import GranularSearch
+from Homberger import Homberger
 import logging
+import time
 logging.basicConfig(format='%(asctime)s - %(levelname)s - %(message)s', level=logging.INFO)
 
 
-def get_problem(file_path):
-    with open(file_path) as f:
-        line = f.readline()
-        while line:
-            if "VEHICLE" in line:
-                _ = f.readline()
-                numbers = [element for element in f.readline().replace("\n", "").split(" ") if element.isnumeric()]
-                num_vehicles = int(numbers[0])
-                capacity = int(numbers[1])
-            elif "CUSTOMER" in line:
-                _ = f.readline()
-                _ = f.readline()
-                node_data = []
-                while True:
-                    numbers = [element for element in f.readline().replace("\n", "").split(" ") if element.isnumeric()]
-                    if len(numbers) == 7:
-                        node_data.append(numbers)
-                    else:
-                        break
-            line = f.readline()
+def get_problem(file_path, storage="list", lazy=False, cache_dir=None):
+    if storage == "array":
+        return load_instance(file_path, Homberger().create(), cache_dir, lazy)
 
-    # convert input to problem
-    depot_indexes = [0]
-    global_attrs = {"wait_for_ready": True}
-    vehicles_with_attrs = [{"capacity": capacity,
-                            "start_time": int(node_data[0][4]),
-                            "end_time": int(node_data[0][5]),
-                            "depot_index": 0}] * num_vehicles
-    nodes_with_attrs = [{"x": int(data[1]),
-                         "y": int(data[2]),
-                         "demand": int(data[3]),
-                         "ready_time": int(data[4]),
-                         "due_time": int(data[5]),
-                         "service_time": int(data[6])} for data in node_data]
-    cost_matrix = []
-    for data1 in node_data:
-        x1, y1 = int(data1[1]), int(data1[2])
-        cost_array = []
-        for data2 in node_data:
-            x2, y2 = int(data2[1]), int(data2[2])
-            cost = math.sqrt((x2-x1)**2 + (y2-y1)**2)
-            cost_array.append(cost)
-        cost_matrix.append(cost_array)
-
-    node_node_attrs = {"cost": cost_matrix}
-    vehicle_node_node_attrs = {}
-
-    return Problem(Homberger().create(), depot_indexes, global_attrs, vehicles_with_attrs, nodes_with_attrs, node_node_attrs, vehicle_node_node_attrs)
+    return build_problem(Homberger().create(), read_solomon(file_path), storage, lazy)
 
 
 if __name__ == "__main__":
     # generate problem
     path = "problems/C1_2_1.TXT"
-    problem = get_problem(path)
-    problem.set_closeness(get_cost)
+    problem = get_problem(path, storage="array", cache_dir="cache")
+    problem.set_closeness(problem.model.cost)
 
     # run algorithm and generate solution
+    start_time = time.perf_counter()
     nearest_search = NearestSearch(problem, neighbourhood_size=100, seed=0)
     solution = nearest_search.solve()
+    print(f"nearest search ({time.perf_counter() - start_time:.2f}s):", solution)
 
-    print(solution)
+    # improve the solution with granular local search
+    start_time = time.perf_counter()
+    granular_search = GranularSearch(problem, granularity=20, strategy="first")
+    solution = granular_search.solve(solution)
+    print(f"granular search ({time.perf_counter() - start_time:.2f}s):", solution)
 
     # ---------- test cases ----------
     # solution1 = Solution(problem)
@@ -0,0 +1,49 @@
+from src.data.InstanceLoader import read_solomon, build_problem
+from src.core.BatchEvaluator import BatchEvaluator
+from src.core.Solution import Solution, Route
+from Homberger import (Homberger, calc_distance, calc_time, calc_route_distance, calc_route_time, time_window_constraint, vehicle_capacity_constraint,
+                       time_window_route_constraint, vehicle_capacity_route_constraint)
+import numpy as np
+import os
+import pytest
+
+INSTANCE = os.path.join(os.path.dirname(__file__), "problems", "C1_2_1.TXT")
+
+
+def get_random_solution(problem, generator):
+    # random routes of random lengths on random vehicles, some jobs stay unassigned and some routes are empty
+    jobs = generator.permutation(problem.job_indexes)[:generator.integers(len(problem.job_indexes) // 2, len(problem.job_indexes) + 1)]
+    num_routes = int(generator.integers(1, 30))
+    vehicles = generator.choice(problem.vehicle_indexes, num_routes, replace=False)
+    cuts = np.sort(generator.integers(0, len(jobs) + 1, num_routes - 1))
+    solution = Solution(problem)
+    for vehicle_idx, route_jobs in zip(vehicles, np.split(jobs, cuts)):
+        solution.add_route(Route(int(vehicle_idx), route_jobs.tolist()))
+    solution.eval_unassigned_jobs()
+    return solution
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_batch_evaluation_matches_objectives(lazy):
+    problem = build_problem(Homberger().create(), read_solomon(INSTANCE), "array", lazy)
+    generator = np.random.default_rng(0)
+    solutions = [get_random_solution(problem, generator) for _ in range(20)]
+    results = BatchEvaluator(problem).evaluate(solutions)
+    for solution_idx, solution in enumerate(solutions):
+        # the scalar objectives are matched exactly, not only up to rounding
+        assert results["distance"][solution_idx] == calc_distance(solution)
+        assert results["time"][solution_idx] == calc_time(solution)
+        assert results["num_unassigned_jobs"][solution_idx] == len(solution.unassigned_jobs)
+        assert results["num_vehicles"][solution_idx] == sum(1 for route in solution.routes if len(route.jobs) > 0)
+        assert results["time_window_feasible"][solution_idx] == time_window_constraint(solution)
+        assert results["capacity_feasible"][solution_idx] == vehicle_capacity_constraint(solution)
+
+    # solutions of random routes are rarely feasible, the violations are compared route by route as well
+    jobs, vehicles = BatchEvaluator.encode(solutions)
+    for solution_idx, solution in enumerate(solutions):
+        routes = BatchEvaluator(problem).evaluate_routes(jobs[solution_idx], vehicles[solution_idx])
+        for route_idx, route in enumerate(solution.routes):
+            assert routes["distance"][route_idx] == calc_route_distance(problem, route)
+            assert routes["time"][route_idx] == calc_route_time(problem, route)
+            assert routes["time_window_violated"][route_idx] != time_window_route_constraint(problem, route)
+            assert routes["capacity_violated"][route_idx] != vehicle_capacity_route_constraint(problem, route)
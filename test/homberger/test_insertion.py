@@ -0,0 +1,131 @@
+from src.data.InstanceLoader import read_solomon, build_problem
+from src.algorithm.constructors.NearestSearch import NearestSearch
+from src.algorithm.operators.LocalSearch import InjectBefore, InjectAfter
+from src.core.Solution import Route
+from Homberger import Homberger
+import random
+import os
+import pytest
+
+INSTANCE = os.path.join(os.path.dirname(__file__), "problems", "C1_2_1.TXT")
+
+
+def get_solution(storage, seed=0):
+    # a constructed solution with a share of its jobs unassigned again and an empty route of an unused vehicle
+    problem = build_problem(Homberger().create(), read_solomon(INSTANCE), storage)
+    problem.set_closeness(problem.model.cost)
+    solution = NearestSearch(problem, neighbourhood_size=20, seed=seed).solve()
+    generator = random.Random(seed)
+    for job in generator.sample(sorted(solution.job_locations), len(solution.job_locations) // 5):
+        route, index = solution.locate_job(job)
+        solution.remove_job(route, index)
+        solution.add_unassigned_job(job)
+    unused_vehicles = [vehicle_idx for vehicle_idx in problem.vehicle_indexes if solution.get_route(vehicle_idx) is None]
+    if unused_vehicles:
+        solution.add_route(Route(unused_vehicles[0]))
+    assert any(len(route.jobs) == 0 for route in solution.routes)
+    solution.eval_solution()
+    return solution, generator
+
+
+def is_feasible(solution):
+    # every constraint evaluated on the whole solution without any cached route result
+    return all(constraint.function(solution) for constraint in solution.problem.model.constraints)
+
+
+@pytest.mark.parametrize("storage", ["list", "array"])
+def test_check_insertion_matches_evaluation(storage):
+    solution, generator = get_solution(storage)
+    unassigned_jobs = sorted(solution.unassigned_jobs)
+    for _ in range(300):
+        route = generator.choice(solution.routes)
+        index = generator.randint(0, len(route.jobs))
+        job = generator.choice(unassigned_jobs)
+        feasible = solution.check_insertion(route, index, job)
+
+        solution.begin()
+        solution.remove_unassigned_job(job)
+        solution.insert_job(route, index, job)
+        assert feasible == is_feasible(solution)
+        solution.rollback()
+    solution.end()
+
+
+@pytest.mark.parametrize("storage", ["list", "array"])
+def test_inject_check_matches_evaluation(storage):
+    solution, generator = get_solution(storage)
+    operators = [InjectBefore(solution), InjectAfter(solution)]
+    unassigned_jobs = sorted(solution.unassigned_jobs)
+    routed_jobs = sorted(solution.job_locations)
+    for _ in range(300):
+        op = generator.choice(operators)
+        a, b = generator.choice(routed_jobs), generator.choice(unassigned_jobs)
+        feasible = op.check(a, b)
+
+        solution.begin()
+        op.move(a, b)
+        assert feasible == is_feasible(solution)
+        solution.rollback()
+    solution.end()
+
+
+def calc_objectives(solution):
+    return [objective.function(solution) for objective in solution.problem.model.objectives]
+
+
+@pytest.mark.parametrize("storage", ["list", "array"])
+def test_insertion_and_removal_deltas_match_evaluation(storage):
+    solution, generator = get_solution(storage)
+    unassigned_jobs = sorted(solution.unassigned_jobs)
+    before = calc_objectives(solution)
+    for _ in range(300):
+        route = generator.choice(solution.routes)
+        index = generator.randint(0, len(route.jobs))
+        job = generator.choice(unassigned_jobs)
+        deltas = solution.insertion_delta(route, index, job)
+
+        solution.begin()
+        solution.remove_unassigned_job(job)
+        solution.insert_job(route, index, job)
+        after = calc_objectives(solution)
+        assert deltas == pytest.approx([value - prev for value, prev in zip(after, before)], abs=1e-6)
+        solution.rollback()
+
+        routes = [route for route in solution.routes if len(route.jobs) > 0]
+        route = generator.choice(routes)
+        index = generator.randrange(len(route.jobs))
+        deltas = solution.removal_delta(route, index)
+        solution.add_unassigned_job(solution.remove_job(route, index))
+        after = calc_objectives(solution)
+        assert deltas == pytest.approx([value - prev for value, prev in zip(after, before)], abs=1e-6)
+        solution.rollback()
+    solution.end()
+
+
+@pytest.mark.parametrize("storage", ["list", "array"])
+def test_inject_delta_matches_evaluation(storage):
+    solution, generator = get_solution(storage)
+    operators = [InjectBefore(solution), InjectAfter(solution)]
+    before = calc_objectives(solution)
+    jobs = sorted(solution.problem.job_indexes)
+    routed_jobs = sorted(solution.job_locations)
+    num_checked = 0
+    for _ in range(300):
+        op = generator.choice(operators)
+        a, b = generator.choice(routed_jobs), generator.choice(jobs)
+        route_a, _ = solution.locate_job(a)
+        route_b, _ = solution.locate_job(b)
+        deltas = op.delta(a, b)
+        if route_a is route_b or a == b:
+            # moves within a route have no delta
+            assert deltas == [None] * len(before)
+            continue
+
+        solution.begin()
+        op.move(a, b)
+        after = calc_objectives(solution)
+        assert deltas == pytest.approx([value - prev for value, prev in zip(after, before)], abs=1e-6)
+        solution.rollback()
+        num_checked += 1
+    solution.end()
+    assert num_checked > 200
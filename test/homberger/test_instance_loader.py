@@ -0,0 +1,21 @@
+from src.data.InstanceLoader import read_solomon, build_problem
+from Homberger import Homberger
+import os
+import pytest
+
+INSTANCE = os.path.join(os.path.dirname(__file__), "problems", "C1_2_1.TXT")
+
+
+def test_lazy_list_storage_is_rejected():
+    with pytest.raises(SystemExit):
+        build_problem(Homberger().create(), read_solomon(INSTANCE), "list", lazy=True)
+
+
+@pytest.mark.parametrize("storage", ["list", "array"])
+def test_storages_hold_the_same_distances(storage):
+    problem = build_problem(Homberger().create(), read_solomon(INSTANCE), storage)
+    lazy_problem = build_problem(Homberger().create(), read_solomon(INSTANCE), "array", lazy=True)
+    cost = problem.model.cost
+    for x in range(0, problem.num_nodes, 17):
+        for y in range(0, problem.num_nodes, 13):
+            assert problem.get_node_node_attr(x, y, cost) == lazy_problem.get_node_node_attr(x, y, lazy_problem.model.cost)